@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class AchievementsConfig(AppConfig):
     name = 'achievements'
+
+    def ready(self):
+        from . import signals
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 20:21
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('achievements', '0005_achievement_language'),
+    ]
+
+    operations = [
+        # Achievements could be granted more than once; the earliest grant is kept.
+        migrations.RunSQL("""
+            DELETE FROM user_achievements
+            WHERE id IN (
+                SELECT id
+                FROM (
+                    SELECT id, row_number() OVER (
+                        PARTITION BY user_id, achievement_id
+                        ORDER BY earned_at NULLS LAST, id
+                    ) AS n
+                    FROM user_achievements
+                ) ua
+                WHERE n > 1
+            );
+        """, migrations.RunSQL.noop),
+        migrations.AlterUniqueTogether(
+            name='userachievement',
+            unique_together=set([('user', 'achievement')]),
+        ),
+    ]
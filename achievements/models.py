@@ -1,14 +1,114 @@
 import collections
 
-from django.db        import models as md
+from django.db        import connection, models as md
 from django.db.models import Q
 
 from users.models import User
 from core.models  import Contest
 from core.models  import Problem
-from core.models  import Attempt
+from core.models  import FirstLanguageSolve
 
 AchievementStatus = collections.namedtuple('AchievementStatus', 'achievement unlocked earned_at progress_percent')
+SolvedProblem = collections.namedtuple('SolvedProblem',
+                                       'problem_id contest_id author developer origin language solved_at')
+
+
+SOLVED_PROBLEM_FIELDS = (
+    'problem', 'contest', 'problem__author', 'problem__developer', 'problem__origin',
+    'highlighter', 'time',
+)
+
+
+def get_solved_problems(user, pic_ids=None):
+    """
+    Returns `SolvedProblem`s of the user (or only of those in the given problems in contest),
+    with all the attributes achievements filter by, in a single query. There is one for every
+    language a problem has been solved in, so that achievements filtering by language count
+    every accepted attempt, not only the first one.
+    """
+
+    first_solves = FirstLanguageSolve.objects.filter(user=user, contest__is_admin=False)
+    if pic_ids is not None:
+        first_solves = first_solves.filter(problem_in_contest__in=pic_ids)
+    return [SolvedProblem(*row) for row in first_solves.values_list(*SOLVED_PROBLEM_FIELDS)]
+
+
+def get_solved_problems_by_user(first_user_id, last_user_id):
+    """
+    Same as `get_solved_problems`, but for every user in the ID range at once.
+    """
+
+    solved_problems = collections.defaultdict(list)
+    for user_id, *row in (
+        FirstLanguageSolve
+        .objects
+        .filter(user__id__range=(first_user_id, last_user_id), contest__is_admin=False)
+        .values_list('user', *SOLVED_PROBLEM_FIELDS)
+    ):
+        solved_problems[user_id].append(SolvedProblem(*row))
+    return solved_problems
+
+
+class AchievementQuerySet(md.QuerySet):
+    def statuses(self, user):
+        """
+        Evaluates every achievement for the user in memory, against the problems they have
+        solved. Does not write anything: achievements are unlocked by `unlock`.
+        """
+
+        earned = dict(
+            UserAchievement
+            .objects
+            .filter(user=user, achievement__in=self)
+            .values_list('achievement', 'earned_at')
+        )
+        solved_problems = None
+        statuses = [ ]
+        for achievement in self:
+            if achievement.id in earned:
+                statuses.append(AchievementStatus(achievement, True, earned[achievement.id], 100))
+            else:
+                if solved_problems is None:
+                    solved_problems = get_solved_problems(user)
+                statuses.append(achievement.evaluate(solved_problems))
+        return statuses
+
+    def unlock(self, user_id):
+        """
+        Grants the user every achievement they have earned but not been granted yet.
+        """
+
+        solved_problems = get_solved_problems(user_id)
+        unlocked = [ ]
+        for achievement in self.exclude(userachievement__user=user_id):
+            status = achievement.evaluate(solved_problems)
+            if status.unlocked:
+                unlocked.append((user_id, achievement.id, status.earned_at))
+        UserAchievement.objects.grant(unlocked)
+
+    def matching(self, solved_problems):
+        """
+        Narrows the achievements down to those whose filters match any of the solved problems.
+        """
+
+        if not solved_problems:
+            return self.none()
+
+        def any_of(field, values):
+            return Q(**{field: None}) | Q(**{field + '__in': set(values)})
+
+        candidates = self.filter(
+            any_of('problem', [solved.problem_id for solved in solved_problems]),
+            any_of('contest', [solved.contest_id for solved in solved_problems]),
+            any_of('origin', [solved.origin for solved in solved_problems] + ['']),
+            any_of('language', [solved.language for solved in solved_problems] + ['']),
+        )
+        return self.filter(id__in=[
+            achievement.id
+            for achievement in candidates
+            if any(achievement.matches(solved) for solved in solved_problems)
+        ])
+
 
 class Achievement(md.Model):
     name        = md.CharField(max_length=255)
@@ -25,42 +125,44 @@ class Achievement(md.Model):
     origin      = md.CharField(max_length=255, null=True, blank=True, default=None)
     language    = md.CharField(max_length=255, null=True, blank=True, default=None)
 
+    objects = AchievementQuerySet.as_manager()
+
     class Meta:
         db_table      = 'achievements'
         get_latest_by = 'created_at'
 
     def status(self, user):
-        try:
-            info = UserAchievement.objects.get(user=user, achievement=self)
-        except UserAchievement.DoesNotExist:
-            info = None
-
-        if info is not None:
-            return AchievementStatus(self, True, info.earned_at, 100)
-
-        query = Q(user=user) & Q(problem_in_contest__contest__is_admin=False) & (
-            Q(result='Accepted') | (Q(result='Tested') & Q(score__gt=99.99)))
-        if self.problem:
-            query = query & Q(problem_in_contest__problem=self.problem)
-        if self.contest:
-            query = query & Q(problem_in_contest__contest=self.contest)
-        if self.author:
-            query = query & (Q(problem_in_contest__problem__author__contains=self.author) | Q(problem_in_contest__problem__developer__contains=self.author))
-        if self.origin:
-            query = query & Q(problem__origin=self.origin)
-        if self.language:
-            query = query & Q(compiler__highlighter=self.language)
-        attempts = Attempt.objects.filter(query).order_by('problem_in_contest__problem', 'time').distinct('problem_in_contest__problem')
-        attempts_amount = len(attempts)
+        return Achievement.objects.filter(id=self.id).statuses(user)[0]
+
+    def matches(self, solved):
+        if self.problem_id is not None and solved.problem_id != self.problem_id:
+            return False
+        if self.contest_id is not None and solved.contest_id != self.contest_id:
+            return False
+        if self.author and self.author not in solved.author and self.author not in solved.developer:
+            return False
+        if self.origin and solved.origin != self.origin:
+            return False
+        if self.language and solved.language != self.language:
+            return False
+        return True
+
+    def evaluate(self, solved_problems):
+        """
+        Returns the status of the achievement for the user who has solved the given problems
+        (see `get_solved_problems`).
+        """
+
+        solved_at = { }
+        for solved in solved_problems:
+            if self.matches(solved):
+                problem_solved_at = solved_at.get(solved.problem_id)
+                if problem_solved_at is None or solved.solved_at < problem_solved_at:
+                    solved_at[solved.problem_id] = solved.solved_at
+        attempts_amount = len(solved_at)
 
         if attempts_amount >= self.amount:
-            attempts = sorted(attempts, key=lambda x: x.time)
-            earned_at = attempts[self.amount - 1].time
-            UserAchievement.objects.create(
-                user=user,
-                achievement=self,
-                earned_at=earned_at
-            )
+            earned_at = sorted(solved_at.values())[self.amount - 1]
             return AchievementStatus(self, True, earned_at, 100)
 
         return AchievementStatus(self, False, None, 100 * attempts_amount / self.amount)
@@ -68,6 +170,30 @@ class Achievement(md.Model):
     def __str__(self):
         return self.name
 
+class UserAchievementQuerySet(md.QuerySet):
+    def grant(self, unlocked):
+        """
+        Grants achievements given as (user_id, achievement_id, earned_at) triples, skipping those
+        granted already (e.g., concurrently). Returns the number of achievements granted.
+        """
+
+        unlocked = list(unlocked)
+        if not unlocked:
+            return 0
+
+        user_ids, achievement_ids, earned_ats = zip(*unlocked)
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO user_achievements (
+                    user_id, achievement_id, earned_at, created_at, updated_at
+                )
+                SELECT u.*, now(), now()
+                FROM unnest(%s::int[], %s::int[], %s::timestamptz[]) u
+                ON CONFLICT (user_id, achievement_id) DO NOTHING
+            """, [list(user_ids), list(achievement_ids), list(earned_ats)])
+            return cursor.rowcount
+
+
 class UserAchievement(md.Model):
     user        = md.ForeignKey(User, md.CASCADE)
     achievement = md.ForeignKey(Achievement, md.CASCADE)
@@ -75,6 +201,9 @@ class UserAchievement(md.Model):
     created_at  = md.DateTimeField(auto_now_add=True)
     updated_at  = md.DateTimeField(auto_now=True)
 
+    objects = UserAchievementQuerySet.as_manager()
+
     class Meta:
-        db_table      = 'user_achievements'
-        get_latest_by = 'created_at'
+        db_table        = 'user_achievements'
+        get_latest_by   = 'created_at'
+        unique_together = ('user', 'achievement')
@@ -0,0 +1,18 @@
+import collections
+
+from django.dispatch import receiver
+
+from core.models import attempts_changed
+from .models     import Achievement, get_solved_problems
+
+
+@receiver(attempts_changed)
+def unlock_achievements(sender, cells, **kwargs):
+    # Only achievements that the newly solved problems may contribute to are evaluated.
+    pic_ids = collections.defaultdict(set)
+    for user_id, pic_id in cells:
+        pic_ids[user_id].add(pic_id)
+    for user_id, user_pic_ids in pic_ids.items():
+        solved_problems = get_solved_problems(user_id, user_pic_ids)
+        if solved_problems:
+            Achievement.objects.matching(solved_problems).unlock(user_id)
@@ -12,11 +12,9 @@ class AchievementsView(TemplateView):
 
         viewed_user = User.objects.get(id=user_id)
 
-        achievements = Achievement.objects.all()
         unlocked = []
         locked = []
-        for achievement in achievements:
-            status = achievement.status(viewed_user)
+        for status in Achievement.objects.all().statuses(viewed_user):
             if status.unlocked:
                 unlocked.append(status)
             else:
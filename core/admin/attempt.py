@@ -1,6 +1,7 @@
 from ajax_select              import make_ajax_form
 from django                   import db, forms
 from django.contrib           import admin
+from django.db                import transaction
 from django.utils.translation import ugettext as _
 from django.utils.safestring  import mark_safe
 
@@ -9,22 +10,116 @@ from jquery_model_admin import JQueryModelAdmin
 from core import models, util
 
 
+class TestInfoFormSet(forms.BaseInlineFormSet):
+    """
+    Edits the packed `TestResults` of an attempt as if they were `LegacyTestInfo` rows, so that a
+    usual tabular inline works with them. Rows are identified by their test numbers.
+    """
+
+    def get_queryset(self):
+        if not hasattr(self, '_queryset'):
+            self._queryset = [
+                models.LegacyTestInfo(id=test.test_number, attempt=self.instance, **test._asdict())
+                for test in (self.instance.tests if self.instance.pk is not None else [ ])
+            ]
+        return self._queryset
+
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        # Not a `ModelChoiceField`: there are no such rows in the database.
+        form.fields[self._pk_field.name] = forms.IntegerField(
+            initial=form.instance.pk, required=False, widget=forms.HiddenInput,
+        )
+
+    def clean(self):
+        super().clean()
+        test_numbers = set()
+        for form in self.forms:
+            test_number = form.cleaned_data.get('test_number')
+            if test_number is None or self._should_delete_form(form):
+                continue
+            if test_number < 1:
+                form.add_error('test_number', _('Test numbers must start with 1.'))
+            elif test_number in test_numbers:
+                form.add_error('test_number', _('Duplicate test number.'))
+            test_numbers.add(test_number)
+
+    def save(self, commit=True):
+        self.new_objects, self.changed_objects, self.deleted_objects = [ ], [ ], [ ]
+        tests = [ ]
+        for form in self.forms:
+            test = form.instance
+            if self._should_delete_form(form):
+                if test.pk is not None:
+                    self.deleted_objects.append(test)
+                continue
+            if test.pk is None:
+                if not form.has_changed():
+                    continue
+                self.new_objects.append(test)
+            elif form.has_changed():
+                self.changed_objects.append((test, form.changed_data))
+            tests.append(models.TestInfo(
+                test.test_number, test.result, test.used_time, test.used_memory,
+                test.checker_comment,
+            ))
+
+        if commit and (self.new_objects or self.changed_objects or self.deleted_objects):
+            with transaction.atomic():
+                models.LegacyTestInfo.objects.filter(attempt=self.instance).delete()
+                models.TestResults.objects.filter(attempt=self.instance).delete()
+                if tests:
+                    models.TestResults.pack(self.instance.pk, tests).save()
+        return self.new_objects + [test for test, changed_data in self.changed_objects]
+
+
 class TestInfoInline(admin.TabularInline):
-    model = models.TestInfo
+    # `LegacyTestInfo` only lends its fields: test results are stored packed.
+    model = models.LegacyTestInfo
+    formset = TestInfoFormSet
+    verbose_name = 'test info'
+    verbose_name_plural = 'test infos'
     fields = ('test_number', 'result', 'used_time', 'used_memory', 'checker_comment')
-    ordering = ['test_number']
     formfield_overrides = {
         db.models.TextField: { 'widget': forms.TextInput },
     }
     extra = 0
 
 
+class AttemptForm(make_ajax_form(models.Attempt, {
+    'user': 'users',
+    'problem_in_contest': 'problems_in_contests',
+})):
+    # Not model fields: these are stored apart from attempts.
+    source          = forms.CharField(label=_('Source'), widget=forms.Textarea, strip=False)
+    error_message   = forms.CharField(
+        label=_('Error message'), widget=forms.Textarea, required=False, strip=False,
+    )
+    checker_comment = forms.CharField(
+        label=_('Checker comment'), widget=forms.Textarea, required=False,
+    )
+
+    PROPERTIES = ('source', 'error_message', 'checker_comment')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk is not None:
+            for name in self.PROPERTIES:
+                self.initial.setdefault(name, getattr(self.instance, name))
+
+    def clean_error_message(self):
+        return self.cleaned_data['error_message'] or None
+
+    def save(self, commit=True):
+        for name in self.PROPERTIES:
+            if self.instance.pk is None or self.cleaned_data[name] != getattr(self.instance, name):
+                setattr(self.instance, name, self.cleaned_data[name])
+        return super().save(commit)
+
+
 @admin.register(models.Attempt)
 class AttemptAdmin(admin.ModelAdmin, JQueryModelAdmin):
-    form = make_ajax_form(models.Attempt, {
-        'user': 'users',
-        'problem_in_contest': 'problems_in_contests',
-    })
+    form = AttemptForm
 
     def get_fieldsets(self, request, attempt=None):
         fieldsets = (
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 18:13
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_text_format'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contest',
+            name='standings_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 18:16
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0012_contest_standings_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttemptSummary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempt_count', models.PositiveIntegerField()),
+                ('accepted', models.BooleanField()),
+                ('best_score', models.FloatField(blank=True, null=True)),
+                ('first_accepted_at', models.DateTimeField(blank=True, null=True)),
+                ('problem_in_contest', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.ProblemInContest')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'attempt summaries',
+                'db_table': 'attempt_summaries',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='attemptsummary',
+            unique_together=set([('user', 'problem_in_contest')]),
+        ),
+        migrations.RunSQL("""
+            INSERT INTO attempt_summaries (
+                user_id, problem_in_contest_id, attempt_count, accepted, best_score, first_accepted_at
+            )
+            SELECT
+                a.user_id, a.problem_in_contest_id, COUNT(*), bool_or(a.result = 'Accepted'),
+                MAX(a.score) FILTER (WHERE a.result = 'Tested'),
+                MIN(a.time) FILTER (WHERE a.result = 'Accepted')
+            FROM attempts a
+            WHERE a.result NOT IN ('', 'Queued', 'Compiling...', 'Compilation error', 'Ignored')
+            AND a.result NOT LIKE 'Testing%'
+            AND a.result NOT LIKE 'System error%'
+            GROUP BY a.user_id, a.problem_in_contest_id
+        """, migrations.RunSQL.noop),
+    ]
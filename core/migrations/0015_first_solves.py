@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 18:34
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0014_attempt_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FirstSolve',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('time', models.DateTimeField()),
+                ('attempt', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.Attempt')),
+                ('compiler', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.Compiler')),
+                ('contest', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.Contest')),
+                ('problem', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.Problem')),
+                ('problem_in_contest', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.ProblemInContest')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'first_solves',
+            },
+        ),
+        migrations.CreateModel(
+            name='FirstSolveWatermark',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('updated_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'first_solve_watermark',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='firstsolve',
+            unique_together=set([('user', 'problem_in_contest')]),
+        ),
+        migrations.RunSQL("""
+            INSERT INTO first_solve_watermark (updated_at)
+            SELECT COALESCE(MAX(updated_at), now()) FROM attempts;
+
+            INSERT INTO first_solves (
+                user_id, problem_in_contest_id, problem_id, contest_id, attempt_id, compiler_id, time
+            )
+            SELECT DISTINCT ON (a.user_id, a.problem_in_contest_id)
+                a.user_id, a.problem_in_contest_id, pic.problem_id, pic.contest_id, a.id,
+                a.compiler_id, a.time
+            FROM attempts a
+            JOIN problem_in_contests pic ON pic.id = a.problem_in_contest_id
+            WHERE a.result = 'Accepted' OR (a.result = 'Tested' AND a.score > 99.99)
+            ORDER BY a.user_id, a.problem_in_contest_id, a.time, a.id;
+        """, migrations.RunSQL.noop),
+    ]
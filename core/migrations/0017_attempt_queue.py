@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 18:46
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_attempt_keyset_index'),
+    ]
+
+    operations = [
+        # Only pending attempts, so that the queue is found without scanning all the others.
+        migrations.RunSQL("""
+            CREATE INDEX attempts_pending_idx ON attempts (id)
+            WHERE result IS NULL OR result IN ('', 'Queued', 'Compiling...') OR
+                result LIKE 'Testing%';
+        """, 'DROP INDEX attempts_pending_idx;'),
+    ]
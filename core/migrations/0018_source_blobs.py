@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 18:55
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_attempt_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SourceBlob',
+            fields=[
+                ('hash', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('data', models.BinaryField()),
+                ('size', models.PositiveIntegerField()),
+            ],
+            options={
+                'db_table': 'source_blobs',
+            },
+        ),
+        # The data is compressed already, PostgreSQL should not try again.
+        migrations.RunSQL(
+            'ALTER TABLE source_blobs ALTER COLUMN data SET STORAGE EXTERNAL;',
+            'ALTER TABLE source_blobs ALTER COLUMN data SET STORAGE EXTENDED;',
+        ),
+        # The column is kept until existing sources are converted with `convertsources`.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RenameField(
+                    model_name='attempt',
+                    old_name='source',
+                    new_name='legacy_source',
+                ),
+                migrations.AlterField(
+                    model_name='attempt',
+                    name='legacy_source',
+                    field=models.TextField(blank=True, db_column='source', null=True),
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL(
+                    'ALTER TABLE attempts ALTER COLUMN source DROP NOT NULL;',
+                    'ALTER TABLE attempts ALTER COLUMN source SET NOT NULL;',
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='source_blob',
+            field=models.ForeignKey(blank=True, db_column='source_hash', null=True, on_delete=django.db.models.deletion.PROTECT, to='core.SourceBlob'),
+        ),
+    ]
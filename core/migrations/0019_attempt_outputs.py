@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 18:59
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_source_blobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttemptOutput',
+            fields=[
+                ('attempt', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='output', serialize=False, to='core.Attempt')),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('checker_comment', models.TextField(blank=True, default='')),
+            ],
+            options={
+                'db_table': 'attempt_outputs',
+            },
+        ),
+        # The tester still writes both columns of `attempts` directly, so they are kept until it
+        # switches to `AttemptQuerySet.report`. Meanwhile, whatever is written there is moved to
+        # `attempt_outputs` by a trigger. Both columns are expected to be written together, as
+        # they always were: together they replace the output of the attempt.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveField(
+                    model_name='attempt',
+                    name='checker_comment',
+                ),
+                migrations.RemoveField(
+                    model_name='attempt',
+                    name='error_message',
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL("""
+                    ALTER TABLE attempts ALTER COLUMN checker_comment SET DEFAULT '';
+
+                    CREATE FUNCTION attempts_move_output() RETURNS trigger AS $$
+                    BEGIN
+                        IF NEW.error_message <> '' OR NEW.checker_comment <> '' THEN
+                            INSERT INTO attempt_outputs (attempt_id, error_message, checker_comment)
+                            VALUES (NEW.id, NEW.error_message, NEW.checker_comment)
+                            ON CONFLICT (attempt_id) DO UPDATE SET
+                                error_message   = EXCLUDED.error_message,
+                                checker_comment = EXCLUDED.checker_comment;
+                        ELSIF TG_OP = 'UPDATE' THEN
+                            DELETE FROM attempt_outputs WHERE attempt_id = NEW.id;
+                        END IF;
+                        NEW.error_message := NULL;
+                        NEW.checker_comment := '';
+                        RETURN NEW;
+                    END
+                    $$ LANGUAGE plpgsql;
+
+                    CREATE TRIGGER attempts_output
+                    BEFORE INSERT OR UPDATE OF error_message, checker_comment ON attempts
+                    FOR EACH ROW EXECUTE PROCEDURE attempts_move_output();
+
+                    UPDATE attempts SET error_message = error_message
+                    WHERE error_message <> '' OR checker_comment <> '';
+                """, """
+                    DROP TRIGGER attempts_output ON attempts;
+                    DROP FUNCTION attempts_move_output();
+
+                    UPDATE attempts a
+                    SET error_message = o.error_message, checker_comment = o.checker_comment
+                    FROM attempt_outputs o
+                    WHERE o.attempt_id = a.id;
+
+                    ALTER TABLE attempts ALTER COLUMN checker_comment DROP DEFAULT;
+                """),
+            ],
+        ),
+    ]
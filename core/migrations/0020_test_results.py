@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 19:03
+from __future__ import unicode_literals
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_attempt_outputs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TestResults',
+            fields=[
+                ('attempt', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='test_results', serialize=False, to='core.Attempt')),
+                ('results', django.contrib.postgres.fields.ArrayField(base_field=models.SmallIntegerField(null=True), size=None)),
+                ('used_time', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(null=True), size=None)),
+                ('used_memory', django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(null=True), size=None)),
+                ('details', django.contrib.postgres.fields.jsonb.JSONField(blank=True, default=dict)),
+            ],
+            options={
+                'db_table': 'test_results',
+            },
+        ),
+        # The table is kept until existing rows are packed with `packtestresults`.
+        migrations.RenameModel(
+            old_name='TestInfo',
+            new_name='LegacyTestInfo',
+        ),
+        # Only `related_name` changes, the foreign key need not be recreated.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='legacytestinfo',
+                    name='attempt',
+                    field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='legacy_tests', to='core.Attempt'),
+                ),
+            ],
+        ),
+    ]
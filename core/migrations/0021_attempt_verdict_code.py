@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 19:07
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_test_results'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attempt',
+            name='test_number',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='verdict_code',
+            field=models.SmallIntegerField(default=0, editable=False),
+        ),
+        # Codes are the `VERDICT_*` constants of `core.models`.
+        migrations.RunSQL("""
+            CREATE FUNCTION attempts_set_verdict() RETURNS trigger AS $$
+            BEGIN
+                NEW.verdict_code := CASE
+                    WHEN NEW.result IS NULL OR NEW.result = '' THEN 0
+                    WHEN NEW.result IN ('Queued', 'Compiling...') THEN 1
+                    WHEN NEW.result LIKE 'Testing%' THEN 2
+                    WHEN NEW.result LIKE 'System error%' THEN 3
+                    WHEN NEW.result = 'Compilation error' THEN 4
+                    WHEN NEW.result = 'Ignored' THEN 5
+                    WHEN NEW.result = 'Accepted' THEN 10
+                    WHEN NEW.result = 'Tested' THEN 11
+                    WHEN NEW.result LIKE 'Wrong answer%' THEN 12
+                    WHEN NEW.result LIKE 'Time limit exceeded%' THEN 13
+                    WHEN NEW.result LIKE 'Runtime error%' THEN 14
+                    WHEN NEW.result LIKE 'Memory limit exceeded%' THEN 15
+                    WHEN NEW.result LIKE 'Presentation error%' THEN 16
+                    WHEN NEW.result LIKE 'Security violation%' THEN 17
+                    WHEN NEW.result LIKE 'Idleness limit exceeded%' THEN 18
+                    ELSE 19
+                END;
+                NEW.test_number := COALESCE(substring(NEW.result FROM ' (\\d{1,4})$')::int, 0);
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql;
+
+            CREATE TRIGGER attempts_verdict
+            BEFORE INSERT OR UPDATE OF result ON attempts
+            FOR EACH ROW EXECUTE PROCEDURE attempts_set_verdict();
+
+            UPDATE attempts SET result = result;
+        """, """
+            DROP TRIGGER attempts_verdict ON attempts;
+            DROP FUNCTION attempts_set_verdict();
+        """),
+        migrations.RunSQL("""
+            DROP INDEX attempts_pending_idx;
+            CREATE INDEX attempts_pending_idx ON attempts (id) WHERE verdict_code <= 2;
+        """, """
+            DROP INDEX attempts_pending_idx;
+            CREATE INDEX attempts_pending_idx ON attempts (id)
+            WHERE result IS NULL OR result IN ('', 'Queued', 'Compiling...') OR
+                result LIKE 'Testing%';
+        """),
+    ]
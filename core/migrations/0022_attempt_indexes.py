@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 19:18
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_attempt_verdict_code'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attempt',
+            index=models.Index(fields=['problem_in_contest', 'time'], name='attempts_pic_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attempt',
+            index=models.Index(fields=['problem_in_contest', 'updated_at'], name='attempts_pic_updated_at_idx'),
+        ),
+        # Attempts counted by standings (`VERDICT_ACCEPTED` and above). The columns read by
+        # standings builders and summaries are all there for index-only scans.
+        migrations.RunSQL("""
+            CREATE INDEX attempts_counted_idx
+            ON attempts (problem_in_contest_id, user_id, time, verdict_code, score)
+            WHERE verdict_code >= 10;
+        """, 'DROP INDEX attempts_counted_idx;'),
+        # Covered by the composite indexes.
+        migrations.AlterField(
+            model_name='attempt',
+            name='problem_in_contest',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.ProblemInContest'),
+        ),
+        migrations.AlterField(
+            model_name='attempt',
+            name='result',
+            field=models.CharField(blank=True, max_length=36, null=True),
+        ),
+        migrations.AlterField(
+            model_name='attempt',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_attempt_indexes'),
+    ]
+
+    operations = [
+        # Summaries are refreshed by the database, so that attempts changed bypassing the ORM
+        # (e.g., verdicts written by the tester) are reflected as well. Only cells whose counted
+        # attempts have actually changed are refreshed; each is locked first, so that concurrent
+        # transactions do not overwrite each other's summaries. Codes 10 and 11 are
+        # `VERDICT_ACCEPTED` and `VERDICT_TESTED`.
+        migrations.RunSQL("""
+            CREATE FUNCTION attempts_refresh_summaries() RETURNS trigger AS $$
+            DECLARE
+                user_ids int[];
+                pic_ids  int[];
+            BEGIN
+                IF TG_OP = 'INSERT' THEN
+                    SELECT array_agg(user_id), array_agg(problem_in_contest_id)
+                    INTO user_ids, pic_ids
+                    FROM (
+                        SELECT DISTINCT user_id, problem_in_contest_id
+                        FROM new_rows
+                        WHERE verdict_code >= 10
+                    ) cells;
+                ELSIF TG_OP = 'DELETE' THEN
+                    SELECT array_agg(user_id), array_agg(problem_in_contest_id)
+                    INTO user_ids, pic_ids
+                    FROM (
+                        SELECT DISTINCT user_id, problem_in_contest_id
+                        FROM old_rows
+                        WHERE verdict_code >= 10
+                    ) cells;
+                ELSE
+                    SELECT array_agg(user_id), array_agg(problem_in_contest_id)
+                    INTO user_ids, pic_ids
+                    FROM (
+                        SELECT r.user_id, r.problem_in_contest_id
+                        FROM old_rows o
+                        JOIN new_rows n ON n.id = o.id
+                        CROSS JOIN LATERAL (VALUES
+                            (o.user_id, o.problem_in_contest_id, o.verdict_code),
+                            (n.user_id, n.problem_in_contest_id, n.verdict_code)
+                        ) r(user_id, problem_in_contest_id, verdict_code)
+                        WHERE r.verdict_code >= 10
+                        AND (
+                            o.user_id, o.problem_in_contest_id, o.verdict_code, o.score, o.time
+                        ) IS DISTINCT FROM (
+                            n.user_id, n.problem_in_contest_id, n.verdict_code, n.score, n.time
+                        )
+                        GROUP BY r.user_id, r.problem_in_contest_id
+                    ) cells;
+                END IF;
+                IF user_ids IS NULL THEN
+                    RETURN NULL;
+                END IF;
+
+                PERFORM pg_advisory_xact_lock(c.user_id, c.problem_in_contest_id)
+                FROM unnest(user_ids, pic_ids) c(user_id, problem_in_contest_id)
+                ORDER BY c.user_id, c.problem_in_contest_id;
+
+                INSERT INTO attempt_summaries (
+                    user_id, problem_in_contest_id, attempt_count, accepted, best_score,
+                    first_accepted_at
+                )
+                SELECT
+                    a.user_id, a.problem_in_contest_id, COUNT(*), bool_or(a.verdict_code = 10),
+                    MAX(a.score) FILTER (WHERE a.verdict_code = 11),
+                    MIN(a.time) FILTER (WHERE a.verdict_code = 10)
+                FROM attempts a
+                WHERE (a.user_id, a.problem_in_contest_id) IN (
+                    SELECT * FROM unnest(user_ids, pic_ids)
+                )
+                AND a.verdict_code >= 10
+                GROUP BY a.user_id, a.problem_in_contest_id
+                ON CONFLICT (user_id, problem_in_contest_id) DO UPDATE SET
+                    attempt_count     = EXCLUDED.attempt_count,
+                    accepted          = EXCLUDED.accepted,
+                    best_score        = EXCLUDED.best_score,
+                    first_accepted_at = EXCLUDED.first_accepted_at;
+
+                DELETE FROM attempt_summaries s
+                WHERE (s.user_id, s.problem_in_contest_id) IN (
+                    SELECT * FROM unnest(user_ids, pic_ids)
+                )
+                AND NOT EXISTS (
+                    SELECT 1
+                    FROM attempts a
+                    WHERE a.user_id = s.user_id
+                    AND a.problem_in_contest_id = s.problem_in_contest_id
+                    AND a.verdict_code >= 10
+                );
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql;
+
+            CREATE TRIGGER attempts_summaries_insert
+            AFTER INSERT ON attempts
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE PROCEDURE attempts_refresh_summaries();
+
+            CREATE TRIGGER attempts_summaries_update
+            AFTER UPDATE ON attempts
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE PROCEDURE attempts_refresh_summaries();
+
+            CREATE TRIGGER attempts_summaries_delete
+            AFTER DELETE ON attempts
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE PROCEDURE attempts_refresh_summaries();
+        """, """
+            DROP TRIGGER attempts_summaries_delete ON attempts;
+            DROP TRIGGER attempts_summaries_update ON attempts;
+            DROP TRIGGER attempts_summaries_insert ON attempts;
+            DROP FUNCTION attempts_refresh_summaries();
+        """),
+        # Summaries may have drifted already.
+        migrations.RunSQL("""
+            DELETE FROM attempt_summaries;
+
+            INSERT INTO attempt_summaries (
+                user_id, problem_in_contest_id, attempt_count, accepted, best_score,
+                first_accepted_at
+            )
+            SELECT
+                a.user_id, a.problem_in_contest_id, COUNT(*), bool_or(a.verdict_code = 10),
+                MAX(a.score) FILTER (WHERE a.verdict_code = 11),
+                MIN(a.time) FILTER (WHERE a.verdict_code = 10)
+            FROM attempts a
+            WHERE a.verdict_code >= 10
+            GROUP BY a.user_id, a.problem_in_contest_id;
+        """, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 20:15
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0023_attempt_summaries_trigger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FirstLanguageSolve',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('highlighter', models.CharField(max_length=32)),
+                ('time', models.DateTimeField()),
+                ('contest', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.Contest')),
+                ('problem', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.Problem')),
+                ('problem_in_contest', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.ProblemInContest')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'first_language_solves',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='firstlanguagesolve',
+            unique_together=set([('user', 'problem_in_contest', 'highlighter')]),
+        ),
+        migrations.RunSQL("""
+            INSERT INTO first_language_solves (
+                user_id, problem_in_contest_id, problem_id, contest_id, highlighter, time
+            )
+            SELECT DISTINCT ON (a.user_id, a.problem_in_contest_id, c.highlighter)
+                a.user_id, a.problem_in_contest_id, pic.problem_id, pic.contest_id, c.highlighter,
+                a.time
+            FROM attempts a
+            JOIN problem_in_contests pic ON pic.id = a.problem_in_contest_id
+            JOIN compilers c ON c.id = a.compiler_id
+            WHERE a.verdict_code = 10 OR (a.verdict_code = 11 AND a.score > 99.99)
+            ORDER BY a.user_id, a.problem_in_contest_id, c.highlighter, a.time;
+        """, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_first_language_solves'),
+    ]
+
+    operations = [
+        # An attempt reset for rejudging must not stay claimed by the tester that judged it
+        # before, or it could not be claimed again until `CLAIM_TIMEOUT` passes: pending
+        # attempts (code 0) are never claimed, since claiming makes them queued.
+        migrations.RunSQL("""
+            CREATE OR REPLACE FUNCTION attempts_set_verdict() RETURNS trigger AS $$
+            BEGIN
+                NEW.verdict_code := CASE
+                    WHEN NEW.result IS NULL OR NEW.result = '' THEN 0
+                    WHEN NEW.result IN ('Queued', 'Compiling...') THEN 1
+                    WHEN NEW.result LIKE 'Testing%' THEN 2
+                    WHEN NEW.result LIKE 'System error%' THEN 3
+                    WHEN NEW.result = 'Compilation error' THEN 4
+                    WHEN NEW.result = 'Ignored' THEN 5
+                    WHEN NEW.result = 'Accepted' THEN 10
+                    WHEN NEW.result = 'Tested' THEN 11
+                    WHEN NEW.result LIKE 'Wrong answer%' THEN 12
+                    WHEN NEW.result LIKE 'Time limit exceeded%' THEN 13
+                    WHEN NEW.result LIKE 'Runtime error%' THEN 14
+                    WHEN NEW.result LIKE 'Memory limit exceeded%' THEN 15
+                    WHEN NEW.result LIKE 'Presentation error%' THEN 16
+                    WHEN NEW.result LIKE 'Security violation%' THEN 17
+                    WHEN NEW.result LIKE 'Idleness limit exceeded%' THEN 18
+                    ELSE 19
+                END;
+                NEW.test_number := COALESCE(substring(NEW.result FROM ' (\\d{1,4})$')::int, 0);
+                IF NEW.verdict_code = 0 THEN
+                    NEW.tester_name := '';
+                END IF;
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql;
+
+            UPDATE attempts SET tester_name = '' WHERE verdict_code = 0 AND tester_name <> '';
+        """, """
+            CREATE OR REPLACE FUNCTION attempts_set_verdict() RETURNS trigger AS $$
+            BEGIN
+                NEW.verdict_code := CASE
+                    WHEN NEW.result IS NULL OR NEW.result = '' THEN 0
+                    WHEN NEW.result IN ('Queued', 'Compiling...') THEN 1
+                    WHEN NEW.result LIKE 'Testing%' THEN 2
+                    WHEN NEW.result LIKE 'System error%' THEN 3
+                    WHEN NEW.result = 'Compilation error' THEN 4
+                    WHEN NEW.result = 'Ignored' THEN 5
+                    WHEN NEW.result = 'Accepted' THEN 10
+                    WHEN NEW.result = 'Tested' THEN 11
+                    WHEN NEW.result LIKE 'Wrong answer%' THEN 12
+                    WHEN NEW.result LIKE 'Time limit exceeded%' THEN 13
+                    WHEN NEW.result LIKE 'Runtime error%' THEN 14
+                    WHEN NEW.result LIKE 'Memory limit exceeded%' THEN 15
+                    WHEN NEW.result LIKE 'Presentation error%' THEN 16
+                    WHEN NEW.result LIKE 'Security violation%' THEN 17
+                    WHEN NEW.result LIKE 'Idleness limit exceeded%' THEN 18
+                    ELSE 19
+                END;
+                NEW.test_number := COALESCE(substring(NEW.result FROM ' (\\d{1,4})$')::int, 0);
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql;
+        """),
+    ]
@@ -1,7 +1,15 @@
-from django.core  import validators as val
-from django.db    import models as md
-from django.urls  import reverse
-from django.utils import timezone
+import collections
+import hashlib
+import threading
+import zlib
+
+from django.conf                    import settings
+from django.contrib.postgres.fields import ArrayField, JSONField
+from django.core                    import validators as val
+from django.db                      import connection, models as md, transaction
+from django.dispatch                import Signal
+from django.urls                    import reverse
+from django.utils                   import timezone
 
 from misc         import pandoc
 from users.models import User
@@ -88,6 +96,8 @@ class Contest(md.Model):
     is_training              = md.BooleanField()
     is_registration_required = md.BooleanField(default=False)
     is_unfrozen              = md.BooleanField(default=False)
+    # Incremented whenever contest's standings may change (see `core.standings.cache`).
+    standings_version        = md.PositiveIntegerField(default=0, editable=False)
     created_at               = md.DateTimeField(auto_now_add=True)
     updated_at               = md.DateTimeField(auto_now=True)
     problems                 = md.ManyToManyField(Problem, through='ProblemInContest')
@@ -305,29 +315,365 @@ class Compiler(md.Model):
         return self.name
 
 
+class SourceBlobQuerySet(md.QuerySet):
+    def store(self, sources):
+        """
+        Stores the sources, unless stored already, and returns their blobs in the same order.
+        """
+
+        blobs = collections.OrderedDict()
+        result = [ ]
+        for source in sources:
+            data = source.encode()
+            key = hashlib.sha256(data).hexdigest()
+            blob = blobs.get(key)
+            if blob is None:
+                blobs[key] = blob = SourceBlob(hash=key, data=zlib.compress(data), size=len(data))
+            result.append(blob)
+
+        if blobs:
+            with connection.cursor() as cursor:
+                cursor.execute("""
+                    INSERT INTO source_blobs (hash, data, size)
+                    SELECT * FROM unnest(%s::varchar[], %s::bytea[], %s::int[])
+                    ON CONFLICT DO NOTHING
+                """, [
+                    [b.hash for b in blobs.values()],
+                    [b.data for b in blobs.values()],
+                    [b.size for b in blobs.values()],
+                ])
+        return result
+
+
+class SourceBlob(md.Model):
+    """
+    A source code, stored once however many attempts it was sent with.
+    """
+
+    hash = md.CharField(max_length=64, primary_key=True) # SHA-256 of the source in UTF-8.
+    data = md.BinaryField()                              # Compressed with zlib.
+    size = md.PositiveIntegerField()                     # In bytes, uncompressed.
+
+    objects = SourceBlobQuerySet.as_manager()
+
+    class Meta:
+        db_table = 'source_blobs'
+
+    def __str__(self):
+        return self.hash
+
+    @property
+    def text(self):
+        return zlib.decompress(bytes(self.data)).decode()
+
+
+# The result of a single test, as stored in `TestResults`.
+TestInfo = collections.namedtuple('TestInfo', [
+    'test_number', 'result', 'used_time', 'used_memory', 'checker_comment',
+])
+TestInfo.__new__.__defaults__ = ('', None, None, '')
+
+# `tests` is a list of `TestInfo`s.
+Verdict = collections.namedtuple('Verdict', [
+    'attempt_id', 'result', 'score', 'used_time', 'used_memory', 'checker_comment',
+    'error_message', 'tests',
+])
+
+
+# Values of `Attempt.verdict_code`. They are derived from `Attempt.result` by the
+# `attempts_verdict` trigger (see migration 0021), which must be kept in sync with these.
+# Pending attempts have codes up to `VERDICT_TESTING`, those counted by standings - from
+# `VERDICT_ACCEPTED` on.
+VERDICT_PENDING            = 0  # NULL or ''.
+VERDICT_QUEUED             = 1  # 'Queued' or 'Compiling...'.
+VERDICT_TESTING            = 2
+VERDICT_SYSTEM_ERROR       = 3
+VERDICT_COMPILATION_ERROR  = 4
+VERDICT_IGNORED            = 5
+VERDICT_ACCEPTED           = 10
+VERDICT_TESTED             = 11 # Kirov (school) attempts, with a score.
+VERDICT_WRONG_ANSWER       = 12
+VERDICT_TIME_LIMIT         = 13
+VERDICT_RUNTIME_ERROR      = 14
+VERDICT_MEMORY_LIMIT       = 15
+VERDICT_PRESENTATION_ERROR = 16
+VERDICT_SECURITY_VIOLATION = 17
+VERDICT_IDLENESS_LIMIT     = 18
+VERDICT_OTHER              = 19
+
+EJUDGE_STATUSES = {
+    VERDICT_PENDING:            b'PD',
+    VERDICT_QUEUED:             b'CG',
+    VERDICT_TESTING:            b'RU',
+    VERDICT_SYSTEM_ERROR:       b'CF',
+    VERDICT_COMPILATION_ERROR:  b'CE',
+    VERDICT_IGNORED:            b'IG',
+    VERDICT_ACCEPTED:           b'OK',
+    VERDICT_TESTED:             b'PT',
+    VERDICT_WRONG_ANSWER:       b'WA',
+    VERDICT_TIME_LIMIT:         b'TL',
+    VERDICT_RUNTIME_ERROR:      b'RT',
+    VERDICT_MEMORY_LIMIT:       b'ML',
+    VERDICT_PRESENTATION_ERROR: b'PE',
+    VERDICT_SECURITY_VIOLATION: b'SE',
+    VERDICT_IDLENESS_LIMIT:     b'WT',
+    VERDICT_OTHER:              b'CF',
+}
+
+
+class AttemptQuerySet(md.QuerySet):
+    """
+    The testing queue. A tester claims a batch of pending attempts, reports on them (each
+    report, or an explicit `heartbeat`, bumps `updated_at`) and finally sets their verdicts,
+    preferably a batch at a time with `report`. Attempts whose tester has not reported for
+    `TESTING['CLAIM_TIMEOUT']` seconds are claimed again by others.
+    """
+
+    # Must match the predicate of `attempts_pending_idx`.
+    PENDING = '{0}.verdict_code <= %d' % VERDICT_TESTING
+
+    def claim(self, tester_name, limit):
+        """
+        Atomically claims up to `limit` pending attempts for the tester and returns them. Live
+        contests come first, then trainings and other new attempts, then rejudges; the oldest
+        first within each group. Attempts being claimed concurrently by others are skipped.
+        """
+
+        with transaction.atomic():
+            attempts = list(self.model.objects.raw("""
+                WITH claimed AS (
+                    SELECT a.id
+                    FROM attempts a
+                    JOIN problem_in_contests pic ON pic.id = a.problem_in_contest_id
+                    JOIN contests c ON c.id = pic.contest_id
+                    WHERE {pending}
+                    AND (a.tester_name = '' OR a.updated_at < now() - %s * interval '1 second')
+                    ORDER BY
+                        CASE
+                            WHEN
+                                EXISTS (SELECT 1 FROM test_results t WHERE t.attempt_id = a.id) OR
+                                EXISTS (SELECT 1 FROM test_infos t WHERE t.attempt_id = a.id)
+                                THEN 2
+                            WHEN NOT c.is_training AND
+                                now() < c.start_time + c.duration * interval '1 minute'
+                                THEN 0
+                            ELSE 1
+                        END,
+                        a.id
+                    LIMIT %s
+                    FOR UPDATE OF a SKIP LOCKED
+                )
+                UPDATE attempts a
+                SET tester_name = %s, result = 'Queued', updated_at = now()
+                FROM claimed
+                WHERE a.id = claimed.id
+                RETURNING {columns}
+            """.format(
+                pending=self.PENDING.format('a'),
+                # Not `a.*`: deprecated columns would be taken for the properties of the same name.
+                columns=', '.join('a.' + f.column for f in self.model._meta.concrete_fields),
+            ), [
+                settings.TESTING['CLAIM_TIMEOUT'], limit, tester_name,
+            ]))
+            md.prefetch_related_objects(attempts, 'source_blob')
+            return attempts
+
+    def heartbeat(self, tester_name, attempt_ids):
+        """
+        Prolongs the tester's claims. Returns the IDs of those still held by the tester.
+        """
+
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                UPDATE attempts a
+                SET updated_at = now()
+                WHERE a.id = ANY(%s) AND a.tester_name = %s AND {pending}
+                RETURNING a.id
+            """.format(pending=self.PENDING.format('a')), [list(attempt_ids), tester_name])
+            return [attempt_id for attempt_id, in cursor]
+
+    def release(self, tester_name, attempt_ids):
+        """
+        Returns unfinished claims of the tester to the queue.
+        """
+
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                UPDATE attempts a
+                SET tester_name = '', updated_at = now()
+                WHERE a.id = ANY(%s) AND a.tester_name = %s AND {pending}
+            """.format(pending=self.PENDING.format('a')), [list(attempt_ids), tester_name])
+
+    def report(self, tester_name, verdicts):
+        """
+        Sets the `Verdict`s of attempts claimed by the tester and replaces their test results,
+        all in a single transaction. Verdicts for attempts no longer claimed by the tester are
+        ignored. Derived data (summaries, first solves, standings, achievements) is updated once
+        for the whole batch. Returns the IDs of the attempts updated.
+        """
+
+        from core.signals import propagate
+
+        verdicts = {verdict.attempt_id: verdict for verdict in verdicts}
+        if not verdicts:
+            return [ ]
+
+        columns = list(zip(*(
+            (v.attempt_id, v.result, v.score, v.used_time, v.used_memory)
+            for v in verdicts.values()
+        )))
+        with transaction.atomic():
+            attempts = list(self.model.objects.raw("""
+                UPDATE attempts a
+                SET
+                    result      = v.result,
+                    score       = v.score,
+                    used_time   = v.used_time,
+                    used_memory = v.used_memory,
+                    updated_at  = now()
+                FROM unnest(%s::int[], %s::varchar[], %s::float8[], %s::float8[], %s::int[])
+                    v(id, result, score, used_time, used_memory)
+                WHERE a.id = v.id AND a.tester_name = %s
+                RETURNING a.id, a.user_id, a.problem_in_contest_id, a.time, a.updated_at
+            """, [list(column) for column in columns] + [tester_name]))
+            attempt_ids = [attempt.id for attempt in attempts]
+            AttemptOutput.objects.filter(attempt__in=attempt_ids).delete()
+            AttemptOutput.objects.bulk_create([
+                AttemptOutput(
+                    attempt_id=attempt_id,
+                    error_message=verdicts[attempt_id].error_message,
+                    checker_comment=verdicts[attempt_id].checker_comment or '',
+                )
+                for attempt_id in attempt_ids
+                if verdicts[attempt_id].error_message or verdicts[attempt_id].checker_comment
+            ])
+            LegacyTestInfo.objects.filter(attempt__in=attempt_ids).delete()
+            TestResults.objects.filter(attempt__in=attempt_ids).delete()
+            TestResults.objects.bulk_create([
+                TestResults.pack(attempt_id, verdicts[attempt_id].tests)
+                for attempt_id in attempt_ids
+                if verdicts[attempt_id].tests
+            ])
+            propagate(attempts)
+        return attempt_ids
+
+
 class Attempt(md.Model):
-    problem_in_contest = md.ForeignKey(ProblemInContest, md.CASCADE)
-    user               = md.ForeignKey(User, md.CASCADE)
-    source             = md.TextField()
+    # Both are indexed as prefixes of the composite indexes below.
+    problem_in_contest = md.ForeignKey(ProblemInContest, md.CASCADE, db_index=False)
+    user               = md.ForeignKey(User, md.CASCADE, db_index=False)
+    source_blob        = md.ForeignKey(
+        SourceBlob, md.PROTECT, blank=True, null=True, db_column='source_hash',
+    )
+    # Sources of old attempts that have not been moved to `SourceBlob`s yet (see the
+    # `convertsources` command), and copies of new ones while `TESTING['LEGACY_SOURCES']` is on.
+    legacy_source      = md.TextField(blank=True, null=True, db_column='source')
     compiler           = md.ForeignKey(Compiler, md.CASCADE)
     time               = md.DateTimeField(auto_now_add=True)
+    # Cleared by the database when `result` is reset, so that rejudges can be claimed at once.
     tester_name        = md.CharField(max_length=48, blank=True, default='')
     # TODO: SET NOT NULL.
-    result             = md.CharField(max_length=36, blank=True, null=True, db_index=True)
-    error_message      = md.TextField(blank=True, null=True) # NULL for optimization reason.
+    result             = md.CharField(max_length=36, blank=True, null=True)
+    # Both are set from `result` by the database, on instances they are only fresh when read.
+    verdict_code       = md.SmallIntegerField(default=VERDICT_PENDING, editable=False)
+    test_number        = md.PositiveSmallIntegerField(default=0, editable=False)
     # TODO: Make this field an integer (properly converting old attempts).
     used_time          = md.FloatField(blank=True, null=True)
     used_memory        = md.PositiveIntegerField(blank=True, null=True)
-    checker_comment    = md.TextField(blank=True, default='')
     score              = md.FloatField(blank=True, null=True)
     # TODO: Remove this field.
     lock_version       = md.IntegerField(blank=True, null=True)
     created_at         = md.DateTimeField(auto_now_add=True)
-    updated_at         = md.DateTimeField(auto_now=True)
+    updated_at         = md.DateTimeField(auto_now=True, db_index=True)
+
+    objects = AttemptQuerySet.as_manager()
+
+    _new_source = None
+    _output_changed = False
 
     class Meta:
         db_table      = 'attempts'
         get_latest_by = 'time'
+        # Besides these, standings, summaries, first solves and best times read attempts they
+        # count through `attempts_counted_idx`, and the testing queue finds pending ones through
+        # `attempts_pending_idx`. Both are partial, so they are created by raw SQL.
+        indexes       = [
+            # For keyset pagination of a user's attempts (see `KeysetPaginationMixin`).
+            md.Index(fields=['user', 'created_at', 'id'], name='attempts_user_created_at_idx'),
+            # For runlogs, full and delta ones, and incremental standings.
+            md.Index(fields=['problem_in_contest', 'time'], name='attempts_pic_time_idx'),
+            md.Index(
+                fields=['problem_in_contest', 'updated_at'], name='attempts_pic_updated_at_idx',
+            ),
+        ]
+
+    @property
+    def source(self):
+        if self._new_source is not None:
+            return self._new_source
+        if self.source_blob_id is None:
+            return self.legacy_source
+        return self.source_blob.text
+
+    @source.setter
+    def source(self, source):
+        self._new_source = source
+
+    def _get_output(self):
+        try:
+            return self.output
+        except AttemptOutput.DoesNotExist:
+            self.output = AttemptOutput()
+            return self.output
+
+    @property
+    def error_message(self):
+        return self._get_output().error_message
+
+    @error_message.setter
+    def error_message(self, error_message):
+        self._get_output().error_message = error_message
+        self._output_changed = True
+
+    @property
+    def checker_comment(self):
+        return self._get_output().checker_comment
+
+    @checker_comment.setter
+    def checker_comment(self, checker_comment):
+        self._get_output().checker_comment = checker_comment
+        self._output_changed = True
+
+    def save(self, *args, **kwargs):
+        if self._new_source is not None:
+            self.source_blob, = SourceBlob.objects.store([self._new_source])
+            self.legacy_source = self._new_source if settings.TESTING['LEGACY_SOURCES'] else None
+            self._new_source = None
+        super().save(*args, **kwargs)
+        if self._output_changed:
+            output = self.output
+            if output.error_message or output.checker_comment:
+                output.attempt = self
+                output.save()
+            else:
+                AttemptOutput.objects.filter(attempt=self).delete()
+            self._output_changed = False
+
+    @property
+    def tests(self):
+        """
+        Results of individual tests as `TestInfo`s, ordered by test number.
+        """
+
+        try:
+            return self.test_results.tests
+        except TestResults.DoesNotExist:
+            return [
+                TestInfo(*test)
+                for test in self.legacy_tests.order_by('test_number').values_list(
+                    'test_number', 'result', 'used_time', 'used_memory', 'checker_comment',
+                )
+            ]
 
     @property
     def problem(self):
@@ -341,6 +687,12 @@ class Attempt(md.Model):
     def verdict(self):
         return self.result if self.score is None else '{0.score:.1f}%'.format(self)
 
+    @property
+    def accepted(self):
+        return self.result == 'Accepted' or (
+            self.result == 'Tested' and self.score is not None and self.score > 99.99
+        )
+
     def __str__(self):
         return '[{0.id:05}/{0.problem.id:03}] {0.problem_in_contest} by {0.user}'.format(self)
 
@@ -348,54 +700,117 @@ class Attempt(md.Model):
         return reverse('contests:attempt', args=[self.id])
 
     @staticmethod
-    def encode_ejudge_verdict(result, score) -> (bytes, int):
-        def parse_test(pos):
-            try:
-                return int(result[pos:])
-            except (IndexError, ValueError):
-                return 0
-
-        # Sorted by popularity.
-        if not result:  # But check for None first.
-            return b'PD', 0
-        if result.startswith('Wrong answer'):
-            return b'WA', parse_test(21)
-        if result.startswith('Time limit exceeded'):
-            return b'TL', parse_test(28)
-        if result.startswith('Runtime error'):
-            return b'RT', parse_test(22)
-        if result == 'Accepted' or (result == 'Tested' and score > 99.99):
+    def encode_ejudge_verdict(verdict_code, test_number, score) -> (bytes, int):
+        if verdict_code == VERDICT_TESTED and score > 99.99:
             # FIXME: Number of passed tests should be returned.
             return b'OK', 0
-        if result == 'Tested':
-            # ditto
-            return b'PT', 0
-        if result.startswith('Memory limit exceeded'):
-            return b'ML', parse_test(30)
-        if result == 'Compilation error':
-            return b'CE', 0
-        if result.startswith('Presentation error'):
-            return b'PE', parse_test(27)
-        if result.startswith('Security violation'):
-            return b'SE', parse_test(27)
-        if result.startswith('Idleness limit exceeded'):
-            return b'WT', parse_test(32)
-        if result == 'Ignored':
-            return b'IG', 0
-        if result.startswith('Testing'):
-            return b'RU', parse_test(11)
-        if result in ('Queued', 'Compiling...'):
-            return b'CG', 0
-        if result.startswith('System error'):
-            return b'CF', parse_test(21)
-        return b'CF', 0
-
-
-class TestInfo(md.Model):
-    attempt         = md.ForeignKey(Attempt, md.CASCADE)
+        return EJUDGE_STATUSES[verdict_code], test_number
+
+
+class AttemptOutput(md.Model):
+    """
+    Compiler and checker messages of an attempt, kept apart not to widen the rows of `attempts`
+    that most queries scan. Only attempts with any messages have one. Read and written through
+    `Attempt.error_message` and `Attempt.checker_comment`.
+    """
+
+    attempt         = md.OneToOneField(
+        Attempt, md.CASCADE, primary_key=True, related_name='output',
+    )
+    error_message   = md.TextField(blank=True, null=True)
+    checker_comment = md.TextField(blank=True, default='')
+
+    class Meta:
+        db_table = 'attempt_outputs'
+
+    def __str__(self):
+        return str(self.attempt_id)
+
+
+# Indices of these are stored in `TestResults.results`, so new ones must only be appended.
+TEST_RESULTS = (
+    '', 'OK', 'Wrong answer', 'Time limit exceeded', 'Runtime error', 'Memory limit exceeded',
+    'Presentation error', 'Security violation', 'Idleness limit exceeded', 'System error',
+)
+_TEST_RESULT_CODES = {result: code for code, result in enumerate(TEST_RESULTS)}
+
+
+class TestResults(md.Model):
+    """
+    Results of all tests of an attempt, packed into arrays indexed by test number minus one
+    (tests without results are NULL there). Results are stored as indices into
+    `TEST_RESULTS`; those not listed there (stored as -1) and checker comments are kept in
+    `details` for the few tests that have them.
+    """
+
+    attempt     = md.OneToOneField(
+        Attempt, md.CASCADE, primary_key=True, related_name='test_results',
+    )
+    results     = ArrayField(md.SmallIntegerField(null=True))
+    used_time   = ArrayField(md.FloatField(null=True))
+    used_memory = ArrayField(md.IntegerField(null=True))
+    # {"<test number>": {"result": ..., "comment": ...}}
+    details     = JSONField(default=dict, blank=True)
+
+    class Meta:
+        db_table = 'test_results'
+
+    def __str__(self):
+        return str(self.attempt_id)
+
+    @classmethod
+    def pack(cls, attempt_id, tests):
+        """
+        Packs `TestInfo`s of the attempt. Raises `ValueError` if a test number is less than 1.
+        """
+
+        if any(test.test_number < 1 for test in tests):
+            raise ValueError('Test numbers must start with 1')
+        count = max([test.test_number for test in tests] or [0])
+        results, used_time, used_memory = [None] * count, [None] * count, [None] * count
+        details = { }
+        for test in tests:
+            i = test.test_number - 1
+            results[i] = _TEST_RESULT_CODES.get(test.result, -1)
+            used_time[i] = test.used_time
+            used_memory[i] = test.used_memory
+            detail = { }
+            if results[i] < 0:
+                detail['result'] = test.result
+            if test.checker_comment:
+                detail['comment'] = test.checker_comment
+            if detail:
+                details[str(test.test_number)] = detail
+        return cls(
+            attempt_id=attempt_id, results=results, used_time=used_time, used_memory=used_memory,
+            details=details,
+        )
+
+    @property
+    def tests(self):
+        tests = [ ]
+        for i, code in enumerate(self.results):
+            if code is not None:
+                detail = self.details.get(str(i + 1), { })
+                tests.append(TestInfo(
+                    i + 1,
+                    detail['result'] if code < 0 else TEST_RESULTS[code],
+                    self.used_time[i],
+                    self.used_memory[i],
+                    detail.get('comment', ''),
+                ))
+        return tests
+
+
+class LegacyTestInfo(md.Model):
+    """
+    A test result of an old attempt, not yet packed into `TestResults` (see the
+    `packtestresults` command).
+    """
+
+    attempt         = md.ForeignKey(Attempt, md.CASCADE, related_name='legacy_tests')
     test_number     = md.PositiveIntegerField()
     result          = md.CharField(max_length=23, blank=True, default='')
-    # TODO: Maybe make these fields non-nullable? TestInfos are immutable anyway.
     used_memory     = md.PositiveIntegerField(blank=True, null=True)
     used_time       = md.FloatField(blank=True, null=True)
     checker_comment = md.TextField(blank=True, default='')
@@ -406,3 +821,304 @@ class TestInfo(md.Model):
 
     def __str__(self):
         return '{0.attempt_id:05}:{0.test_number}'.format(self)
+
+
+class AttemptSummaryQuerySet(md.QuerySet):
+    # Same attempts as counted by ACM standings: judged and neither ignored nor failed to compile.
+    # Keep in sync with the `attempts_refresh_summaries` trigger.
+    SQL = """
+        INSERT INTO attempt_summaries (
+            user_id, problem_in_contest_id, attempt_count, accepted, best_score, first_accepted_at
+        )
+        SELECT
+            a.user_id, a.problem_in_contest_id, COUNT(*), bool_or(a.verdict_code = {accepted}),
+            MAX(a.score) FILTER (WHERE a.verdict_code = {tested}),
+            MIN(a.time) FILTER (WHERE a.verdict_code = {accepted})
+        FROM attempts a
+        WHERE {0}
+        AND a.verdict_code >= {accepted}
+        GROUP BY a.user_id, a.problem_in_contest_id
+        ON CONFLICT (user_id, problem_in_contest_id) DO UPDATE SET
+            attempt_count     = EXCLUDED.attempt_count,
+            accepted          = EXCLUDED.accepted,
+            best_score        = EXCLUDED.best_score,
+            first_accepted_at = EXCLUDED.first_accepted_at;
+
+        DELETE FROM attempt_summaries s
+        WHERE {1}
+        AND NOT EXISTS (
+            SELECT 1
+            FROM attempts a
+            WHERE a.user_id = s.user_id
+            AND a.problem_in_contest_id = s.problem_in_contest_id
+            AND a.verdict_code >= {accepted}
+        );
+    """
+
+    def _refresh(self, condition, params):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                self.SQL.format(
+                    condition.format(table='a'), condition.format(table='s'),
+                    accepted=VERDICT_ACCEPTED, tested=VERDICT_TESTED,
+                ),
+                params * 2,
+            )
+
+    def rebuild(self, contest_id):
+        """
+        Recalculates all summaries of the contest. Summaries are normally kept up to date by
+        a trigger on attempts (see migration 0023); this repairs them should they ever drift.
+        """
+
+        self._refresh("""
+            {table}.problem_in_contest_id IN (
+                SELECT id FROM problem_in_contests WHERE contest_id = %s
+            )
+        """, [contest_id])
+
+
+class AttemptSummary(md.Model):
+    """
+    Aggregated attempts of a user for a problem in contest, so that training standings
+    do not have to scan every attempt ever sent. Kept up to date by a trigger on attempts,
+    so that verdicts written by the tester are reflected as well.
+    """
+
+    user               = md.ForeignKey(User, md.CASCADE, db_index=False)
+    problem_in_contest = md.ForeignKey(ProblemInContest, md.CASCADE)
+    attempt_count      = md.PositiveIntegerField()
+    accepted           = md.BooleanField()
+    best_score         = md.FloatField(blank=True, null=True)
+    first_accepted_at  = md.DateTimeField(blank=True, null=True)
+
+    objects = AttemptSummaryQuerySet.as_manager()
+
+    class Meta:
+        db_table            = 'attempt_summaries'
+        unique_together     = ('user', 'problem_in_contest')
+        verbose_name_plural = 'attempt summaries'
+
+    def __str__(self):
+        return '{0.problem_in_contest} by {0.user}'.format(self)
+
+
+# Sent with (user_id, pic_id) pairs whose attempts have changed, including changes made
+# bypassing the ORM (see `FirstSolveQuerySet.sync`).
+attempts_changed = Signal(providing_args=['cells'])
+# Sent with the IDs of users whose `FirstSolve`s may have changed.
+first_solves_changed = Signal(providing_args=['user_ids'])
+
+
+class FirstSolveWatermark(md.Model):
+    """
+    The latest `Attempt.updated_at` reflected in `FirstSolve`s. There is only one such record.
+    """
+
+    updated_at = md.DateTimeField()
+
+    class Meta:
+        db_table = 'first_solve_watermark'
+
+    def __str__(self):
+        return str(self.updated_at)
+
+
+class FirstSolveQuerySet(md.QuerySet):
+    SQL = """
+        INSERT INTO first_solves (
+            user_id, problem_in_contest_id, problem_id, contest_id, attempt_id, compiler_id, time
+        )
+        SELECT DISTINCT ON (a.user_id, a.problem_in_contest_id)
+            a.user_id, a.problem_in_contest_id, pic.problem_id, pic.contest_id, a.id,
+            a.compiler_id, a.time
+        FROM attempts a
+        JOIN problem_in_contests pic ON pic.id = a.problem_in_contest_id
+        WHERE {0}
+        AND (a.verdict_code = {accepted} OR (a.verdict_code = {tested} AND a.score > 99.99))
+        ORDER BY a.user_id, a.problem_in_contest_id, a.time, a.id
+        ON CONFLICT (user_id, problem_in_contest_id) DO UPDATE SET
+            problem_id  = EXCLUDED.problem_id,
+            contest_id  = EXCLUDED.contest_id,
+            attempt_id  = EXCLUDED.attempt_id,
+            compiler_id = EXCLUDED.compiler_id,
+            time        = EXCLUDED.time;
+
+        DELETE FROM first_solves s
+        WHERE {1}
+        AND NOT EXISTS (
+            SELECT 1
+            FROM attempts a
+            WHERE a.user_id = s.user_id
+            AND a.problem_in_contest_id = s.problem_in_contest_id
+            AND (a.verdict_code = {accepted} OR (a.verdict_code = {tested} AND a.score > 99.99))
+        );
+
+        INSERT INTO first_language_solves (
+            user_id, problem_in_contest_id, problem_id, contest_id, highlighter, time
+        )
+        SELECT DISTINCT ON (a.user_id, a.problem_in_contest_id, c.highlighter)
+            a.user_id, a.problem_in_contest_id, pic.problem_id, pic.contest_id, c.highlighter,
+            a.time
+        FROM attempts a
+        JOIN problem_in_contests pic ON pic.id = a.problem_in_contest_id
+        JOIN compilers c ON c.id = a.compiler_id
+        WHERE {0}
+        AND (a.verdict_code = {accepted} OR (a.verdict_code = {tested} AND a.score > 99.99))
+        ORDER BY a.user_id, a.problem_in_contest_id, c.highlighter, a.time
+        ON CONFLICT (user_id, problem_in_contest_id, highlighter) DO UPDATE SET
+            problem_id = EXCLUDED.problem_id,
+            contest_id = EXCLUDED.contest_id,
+            time       = EXCLUDED.time;
+
+        DELETE FROM first_language_solves s
+        WHERE {1}
+        AND NOT EXISTS (
+            SELECT 1
+            FROM attempts a
+            JOIN compilers c ON c.id = a.compiler_id
+            WHERE a.user_id = s.user_id
+            AND a.problem_in_contest_id = s.problem_in_contest_id
+            AND c.highlighter = s.highlighter
+            AND (a.verdict_code = {accepted} OR (a.verdict_code = {tested} AND a.score > 99.99))
+        );
+    """
+
+    # Transactions may commit in an order different from their `updated_at`, so a short period
+    # before the watermark is re-examined on every sync.
+    LAG = timezone.timedelta(seconds=30)
+    # `updated_at` of the attempts within that period this process has already applied, by ID.
+    _seen = { }
+    _seen_lock = threading.Lock()
+
+    def _refresh(self, condition, params):
+        with transaction.atomic(), connection.cursor() as cursor:
+            users_sql = 'SELECT DISTINCT s.user_id FROM first_solves s WHERE ' + condition
+            cursor.execute(users_sql.format(table='s'), params)
+            user_ids = {user_id for user_id, in cursor}
+            cursor.execute(
+                self.SQL.format(
+                    condition.format(table='a'), condition.format(table='s'),
+                    accepted=VERDICT_ACCEPTED, tested=VERDICT_TESTED,
+                ),
+                params * 4,
+            )
+            cursor.execute(users_sql.format(table='s'), params)
+            user_ids.update(user_id for user_id, in cursor)
+        if user_ids:
+            first_solves_changed.send(sender=FirstSolve, user_ids=sorted(user_ids))
+
+    def refresh(self, cells):
+        """
+        Recalculates first solves of the given (user_id, pic_id) pairs.
+        """
+
+        cells = list(cells)
+        if cells:
+            user_ids, pic_ids = zip(*cells)
+            self._refresh("""
+                ({table}.user_id, {table}.problem_in_contest_id) IN (
+                    SELECT * FROM unnest(%s::int[], %s::int[])
+                )
+            """, [list(user_ids), list(pic_ids)])
+
+    def refresh_problem(self, pic_id):
+        """
+        Recalculates first solves of a problem in contest, e.g., after it has been edited.
+        """
+
+        self._refresh('{table}.problem_in_contest_id = %s', [pic_id])
+
+    def rebuild(self, contest_id):
+        """
+        Recalculates all first solves in the contest.
+        """
+
+        self._refresh("""
+            {table}.problem_in_contest_id IN (
+                SELECT id FROM problem_in_contests WHERE contest_id = %s
+            )
+        """, [contest_id])
+
+    def sync(self):
+        """
+        Applies changes of attempts made bypassing the ORM (e.g., by the tester) since the last
+        sync. Called periodically (see `UserRatingQuerySet.sync`). Writes nothing unless
+        something has changed.
+        """
+
+        cls = type(self)
+        with cls._seen_lock:
+            watermark = FirstSolveWatermark.objects.get().updated_at
+            changes = (
+                Attempt
+                .objects
+                .filter(updated_at__gte=watermark - self.LAG)
+                .values_list('id', 'updated_at', 'user', 'problem_in_contest')
+            )
+            seen = { }
+            cells = set()
+            latest = watermark
+            for attempt_id, updated_at, user_id, pic_id in changes:
+                if cls._seen.get(attempt_id) != updated_at:
+                    seen[attempt_id] = updated_at
+                    cells.add((user_id, pic_id))
+                    latest = max(latest, updated_at)
+            if not cells:
+                return
+
+            with transaction.atomic():
+                self.refresh(cells)
+                attempts_changed.send(sender=Attempt, cells=cells)
+                # Concurrent syncs may only move the watermark forward.
+                FirstSolveWatermark.objects.filter(updated_at__lt=latest).update(updated_at=latest)
+            cls._seen.update(seen)
+            horizon = latest - self.LAG
+            cls._seen = {k: v for k, v in cls._seen.items() if v >= horizon}
+
+
+class FirstSolve(md.Model):
+    """
+    The first accepted attempt of a user for a problem in contest. Problem and contest are
+    copied from the latter, so that statistics filter and group first solves without joining
+    attempts. Kept up to date by `core.signals` and `FirstSolveQuerySet.sync`.
+    """
+
+    user               = md.ForeignKey(User, md.CASCADE, db_index=False)
+    problem_in_contest = md.ForeignKey(ProblemInContest, md.CASCADE)
+    problem            = md.ForeignKey(Problem, md.CASCADE)
+    contest            = md.ForeignKey(Contest, md.CASCADE)
+    attempt            = md.ForeignKey(Attempt, md.CASCADE)
+    compiler           = md.ForeignKey(Compiler, md.CASCADE, db_index=False)
+    time               = md.DateTimeField()
+
+    objects = FirstSolveQuerySet.as_manager()
+
+    class Meta:
+        db_table        = 'first_solves'
+        unique_together = ('user', 'problem_in_contest')
+
+    def __str__(self):
+        return '{0.problem_in_contest} by {0.user}'.format(self)
+
+
+class FirstLanguageSolve(md.Model):
+    """
+    The first accepted attempt of a user for a problem in contest in each language (i.e.,
+    compiler highlighter) they have solved it in, for achievements filtering by language.
+    Kept up to date along with `FirstSolve`s.
+    """
+
+    user               = md.ForeignKey(User, md.CASCADE, db_index=False)
+    problem_in_contest = md.ForeignKey(ProblemInContest, md.CASCADE)
+    problem            = md.ForeignKey(Problem, md.CASCADE)
+    contest            = md.ForeignKey(Contest, md.CASCADE)
+    highlighter        = md.CharField(max_length=32)
+    time               = md.DateTimeField()
+
+    class Meta:
+        db_table        = 'first_language_solves'
+        unique_together = ('user', 'problem_in_contest', 'highlighter')
+
+    def __str__(self):
+        return '{0.problem_in_contest} by {0.user} in {0.highlighter}'.format(self)
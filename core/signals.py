@@ -0,0 +1,60 @@
+from django.db                import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch          import receiver
+
+from core.models    import (
+    Attempt, FirstSolve, ProblemInContest, attempts_changed,
+)
+from core.standings import cache, incremental
+
+
+def propagate(attempts):
+    """
+    Updates everything derived from the attempts, once for all of them.
+    """
+
+    cells = {(attempt.user_id, attempt.problem_in_contest_id) for attempt in attempts}
+    FirstSolve.objects.refresh(cells)
+    attempts_changed.send(sender=Attempt, cells=cells)
+    # Neither cached nor in-memory standings may reflect changes that are not committed yet,
+    # or never will be.
+    moments = [(attempt.problem_in_contest_id, attempt.time) for attempt in attempts]
+    transaction.on_commit(lambda: cache.invalidate_attempts(moments))
+    if incremental.is_active():
+        pics = {
+            pic_id: (contest_id, number)
+            for pic_id, contest_id, number in (
+                ProblemInContest
+                .objects
+                .filter(id__in={pic_id for user_id, pic_id in cells})
+                .values_list('id', 'contest', 'number')
+            )
+        }
+        changes = [
+            (
+                attempt.id, attempt.updated_at, pics[attempt.problem_in_contest_id][0],
+                attempt.user_id, pics[attempt.problem_in_contest_id][1] - 1,
+            )
+            for attempt in attempts
+            if attempt.problem_in_contest_id in pics
+        ]
+        transaction.on_commit(lambda: incremental.notify(changes))
+
+
+@receiver([post_save, post_delete], sender=Attempt)
+def update_standings(sender, instance, **kwargs):
+    propagate([instance])
+
+
+@receiver([post_save, post_delete], sender=ProblemInContest)
+def forget_standings(sender, instance, **kwargs):
+    contest_id = instance.contest_id
+    transaction.on_commit(lambda: cache.invalidate_contest(contest_id))
+    transaction.on_commit(lambda: incremental.forget(contest_id))
+
+
+@receiver(post_save, sender=ProblemInContest)
+def update_first_solves(sender, instance, created, **kwargs):
+    # The problem may have been replaced.
+    if not created:
+        FirstSolve.objects.refresh_problem(instance.id)
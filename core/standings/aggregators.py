@@ -19,10 +19,68 @@ ID ever used to populate the aggregator.
 
 For a column-based aggregator, `finalize` should return a (reenterable) iterable
 of length exactly `problem_count` containing results of an aggregation.
+
+Instead of `update`, an aggregator can be fed with a whole `AttemptBatch` at once via
+`update_batch`. A batch keeps attempts column-wise (user IDs, problem numbers, scores, etc.),
+so aggregators that override `update_batch` process them in tight loops over plain lists,
+without a method call and property evaluations per attempt. The results are the same as if
+the attempts of the batch were passed to `update` one by one, in order.
 """
 
 import abc
 import collections
+import operator
+
+from django.utils.functional import cached_property
+
+from .attempt_results import ACCEPTED_SCORE, REJECTED_SCORE
+
+
+class AttemptBatch:
+    def __init__(self, attempts):
+        self.attempts = attempts
+
+    @cached_property
+    def user_ids(self):
+        return [a.user_id for a in self.attempts]
+
+    @cached_property
+    def problem_numbers(self):
+        return [a.problem_number for a in self.attempts]
+
+    @cached_property
+    def scores(self):
+        return [a.score for a in self.attempts]
+
+    @cached_property
+    def counts(self):
+        return [a.count for a in self.attempts]
+
+    @cached_property
+    def minutes(self):
+        return [a.minutes for a in self.attempts]
+
+    @cached_property
+    def accepted(self):
+        return [score > ACCEPTED_SCORE for score in self.scores]
+
+    @cached_property
+    def rejected(self):
+        return [score < REJECTED_SCORE for score in self.scores]
+
+    @cached_property
+    def accepted_attempts(self):
+        return [a for a, accepted in zip(self.attempts, self.accepted) if accepted]
+
+    @staticmethod
+    def group_by_problem(attempts):
+        groups = collections.defaultdict(list)
+        for attempt in attempts:
+            groups[attempt.problem_number].append(attempt)
+        return groups
+
+
+_get_time = operator.attrgetter('time')
 
 
 class Aggregator(abc.ABC):
@@ -30,6 +88,10 @@ class Aggregator(abc.ABC):
     def update(self, attempt):
         pass
 
+    def update_batch(self, batch):
+        for attempt in batch.attempts:
+            self.update(attempt)
+
     def finalize(self):
         self.update = None
 
@@ -60,12 +122,26 @@ class LastSubmittedAggregator(BestAttemptAggregator):
     def check(candidate, best):
         return best is None or candidate.time > best.time
 
+    def select(self, batch):
+        return batch.attempts
+
+    def update_batch(self, batch):
+        candidates = self.select(batch)
+        if candidates:
+            # `max` returns the first of equal items, just like the strict `check` keeps it.
+            if self.result is not None:
+                candidates = [self.result] + candidates
+            self.result = max(candidates, key=_get_time)
+
 
 class LastAcceptedAggregator(LastSubmittedAggregator):
     @classmethod
     def check(cls, candidate, best):
         return candidate.accepted and super().check(candidate, best)
 
+    def select(self, batch):
+        return batch.accepted_attempts
+
 
 # Row-based aggregators.
 
@@ -79,6 +155,11 @@ class AcceptedCountRowAggregator(_ResultMixin, Aggregator):
         else:
             self.result[attempt.user_id]
 
+    def update_batch(self, batch):
+        result = self.result
+        for user_id, accepted in zip(batch.user_ids, batch.accepted):
+            result[user_id] += 1 if accepted else 0
+
 
 class ScoreRowAggregator(_ResultMixin, Aggregator):
     def __init__(self, scores):
@@ -91,6 +172,17 @@ class ScoreRowAggregator(_ResultMixin, Aggregator):
         else:
             self.result[attempt.user_id]
 
+    def update_batch(self, batch):
+        result = self.result
+        scores = self.scores
+        for user_id, problem_number, score, rejected in zip(
+            batch.user_ids, batch.problem_numbers, batch.scores, batch.rejected,
+        ):
+            if not rejected:
+                result[user_id] += score * scores[problem_number]
+            else:
+                result[user_id]
+
 
 class PenaltyTimeRowAggregator(_ResultMixin, Aggregator):
     def __init__(self, penalty=20):
@@ -106,6 +198,17 @@ class PenaltyTimeRowAggregator(_ResultMixin, Aggregator):
     def calculate_penalty(self, attempt):
         return attempt.minutes + (attempt.count - 1) * self.penalty
 
+    def update_batch(self, batch):
+        result = self.result
+        penalty = self.penalty
+        for user_id, rejected, minutes, count in zip(
+            batch.user_ids, batch.rejected, batch.minutes, batch.counts,
+        ):
+            if not rejected:
+                result[user_id] += minutes + (count - 1) * penalty
+            else:
+                result[user_id]
+
 
 # Column-based aggregators.
 
@@ -116,6 +219,11 @@ class TotalAttemptsColumnAggregator(_ResultMixin, Aggregator):
     def update(self, attempt):
         self.result[attempt.problem_number] += attempt.count
 
+    def update_batch(self, batch):
+        result = self.result
+        for problem_number, count in zip(batch.problem_numbers, batch.counts):
+            result[problem_number] += count
+
 
 class AcceptedAttemptsColumnAggregator(_ResultMixin, Aggregator):
     def __init__(self, problem_count):
@@ -125,6 +233,12 @@ class AcceptedAttemptsColumnAggregator(_ResultMixin, Aggregator):
         if attempt.accepted:
             self.result[attempt.problem_number] += 1
 
+    def update_batch(self, batch):
+        result = self.result
+        for problem_number, accepted in zip(batch.problem_numbers, batch.accepted):
+            if accepted:
+                result[problem_number] += 1
+
 
 class NonAcceptedAttemptsColumnAggregator(_ResultMixin, Aggregator):
     def __init__(self, problem_count):
@@ -133,6 +247,13 @@ class NonAcceptedAttemptsColumnAggregator(_ResultMixin, Aggregator):
     def update(self, attempt):
         self.result[attempt.problem_number] += attempt.count - attempt.accepted
 
+    def update_batch(self, batch):
+        result = self.result
+        for problem_number, count, accepted in zip(
+            batch.problem_numbers, batch.counts, batch.accepted,
+        ):
+            result[problem_number] += count - accepted
+
 
 class TotalScoreColumnAggregator(_ResultMixin, Aggregator):
     def __init__(self, problem_count):
@@ -141,6 +262,11 @@ class TotalScoreColumnAggregator(_ResultMixin, Aggregator):
     def update(self, attempt):
         self.result[attempt.problem_number] += attempt.score
 
+    def update_batch(self, batch):
+        result = self.result
+        for problem_number, score in zip(batch.problem_numbers, batch.scores):
+            result[problem_number] += score
+
 
 class BestAttemptColumnAggregator(_ResultMixin, Aggregator):
     def __init__(self, problem_count):
@@ -154,26 +280,57 @@ class BestAttemptColumnAggregator(_ResultMixin, Aggregator):
     def check(self, candidate, best):
         pass
 
+    def select(self, batch):
+        return batch.attempts
+
+    @staticmethod
+    @abc.abstractmethod
+    def choose(candidates):
+        """
+        Returns the best of the candidates, the first one in case of a tie.
+        """
+
+    def update_batch(self, batch):
+        result = self.result
+        for problem_number, candidates in batch.group_by_problem(self.select(batch)).items():
+            if result[problem_number] is not None:
+                candidates.insert(0, result[problem_number])
+            result[problem_number] = self.choose(candidates)
+
 
 class FirstSubmittedColumnAggregator(BestAttemptColumnAggregator):
     @staticmethod
     def check(candidate, best):
         return best is None or candidate.time < best.time
 
+    @staticmethod
+    def choose(candidates):
+        return min(candidates, key=_get_time)
+
 
 class LastSubmittedColumnAggregator(BestAttemptColumnAggregator):
     @staticmethod
     def check(candidate, best):
         return best is None or candidate.time > best.time
 
+    @staticmethod
+    def choose(candidates):
+        return max(candidates, key=_get_time)
+
 
 class FirstAcceptedColumnAggregator(FirstSubmittedColumnAggregator):
     @classmethod
     def check(cls, candidate, best):
         return candidate.accepted and super().check(candidate, best)
 
+    def select(self, batch):
+        return batch.accepted_attempts
+
 
 class LastAcceptedColumnAggregator(LastSubmittedColumnAggregator):
     @classmethod
     def check(cls, candidate, best):
         return candidate.accepted and super().check(candidate, best)
+
+    def select(self, batch):
+        return batch.accepted_attempts
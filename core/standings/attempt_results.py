@@ -3,7 +3,17 @@ import abc
 from core.util import format_time
 
 
-class AttemptResult(abc.ABC):
+# Scores above `ACCEPTED_SCORE` count as accepted, those below `REJECTED_SCORE` as rejected.
+ACCEPTED_SCORE = .9999
+REJECTED_SCORE = .0001
+
+
+# Standings of a large training consist of tens of thousands of these, so every class in the
+# hierarchy declares `__slots__`. Mixins declare empty ones; attributes they set are declared by
+# the concrete classes instead (a class cannot have several bases with nonempty slots).
+class AttemptResult(metaclass=abc.ABCMeta):
+    __slots__ = ('user_id', 'problem_number', 'score')
+
     def __init__(self, user_id, problem_number, score):
         assert -1e-6 < score < 1 + 1e-6, "Invalid %s's score: %f" % (type(self).__name__, score)
         self.user_id = user_id
@@ -12,11 +22,11 @@ class AttemptResult(abc.ABC):
 
     @property
     def accepted(self):
-        return self.score > .9999
+        return self.score > ACCEPTED_SCORE
 
     @property
     def rejected(self):
-        return self.score < .0001
+        return self.score < REJECTED_SCORE
 
     def describe(self, usernames, pics):
         return '{0}, "{1.ordering_id}. {1.problem.name}"'.format(
@@ -29,6 +39,8 @@ class AttemptResult(abc.ABC):
 
 
 class _CountedMixin:
+    __slots__ = ()
+
     def __init__(self, count, *args, **kwargs):
         assert count > 0, "Invalid %s's count: %s" % (type(self).__name__, count)
         self.count = count
@@ -36,6 +48,8 @@ class _CountedMixin:
 
 
 class TimedMixin:
+    __slots__ = ()
+
     def __init__(self, time, contest_start_time, *args, **kwargs):
         assert time is not None, "%s's time must not be None" % type(self).__name__
         self.time = time
@@ -50,6 +64,8 @@ class TimedMixin:
 
 
 class AcmTrainingAttemptResult(AttemptResult):
+    __slots__ = ()
+
     def __init__(self, user_id, problem_number, accepted):
         super().__init__(user_id, problem_number, bool(accepted))
 
@@ -58,6 +74,8 @@ class AcmTrainingAttemptResult(AttemptResult):
 
 
 class AcmAttemptResult(_CountedMixin, AcmTrainingAttemptResult):
+    __slots__ = ('count', )
+
     def __init__(self, user_id, problem_number, accepted, count):
         super().__init__(count, user_id, problem_number, accepted)
 
@@ -76,11 +94,15 @@ class AcmAttemptResult(_CountedMixin, AcmTrainingAttemptResult):
 
 
 class TimedAcmAttemptResult(TimedMixin, AcmAttemptResult):
+    __slots__ = ('time', 'minutes')
+
     def __init__(self, user_id, problem_number, accepted, count, time, contest_start_time):
         super().__init__(time, contest_start_time, user_id, problem_number, accepted, count)
 
 
 class KirovTrainingAttemptResult(AttemptResult):
+    __slots__ = ()
+
     @property
     def percentage(self):
         result = '%.1f' % (self.score * 100)
@@ -94,6 +116,8 @@ class KirovTrainingAttemptResult(AttemptResult):
 
 
 class KirovAttemptResult(_CountedMixin, KirovTrainingAttemptResult):
+    __slots__ = ('count', )
+
     def __init__(self, user_id, problem_number, score, count):
         super().__init__(count, user_id, problem_number, score)
 
@@ -102,5 +126,7 @@ class KirovAttemptResult(_CountedMixin, KirovTrainingAttemptResult):
 
 
 class TimedKirovAttemptResult(TimedMixin, KirovAttemptResult):
+    __slots__ = ('time', 'minutes')
+
     def __init__(self, user_id, problem_number, score, count, time, contest_start_time):
         super().__init__(time, contest_start_time, user_id, problem_number, score, count)
@@ -1,29 +1,28 @@
 from django.db import connection
 
+from core.models       import VERDICT_ACCEPTED
 from core.util         import format_time
 from .base             import BaseStandingsBuilder
-from .util             import LastAttemptsMixin
+from .util             import DueTimeMixin, LastAttemptsMixin, restrict_to_cell
 from ..aggregators     import *
 from ..attempt_results import TimedAcmAttemptResult
 
 
-class AcmStandingsBuilder(LastAttemptsMixin, BaseStandingsBuilder):
-    def __init__(self, contest, unfrozen):
-        super().__init__(contest)
-        self.unfrozen = unfrozen
-
-    def generate_attempts(self):
+class AcmStandingsBuilder(LastAttemptsMixin, DueTimeMixin, BaseStandingsBuilder):
+    def generate_attempts(self, user_id=None, problem_number=None):
+        restriction, params = restrict_to_cell(user_id, problem_number)
         with connection.cursor() as cursor:
             cursor.execute("""
                 WITH all_attempts AS (
-                    SELECT a.user_id, pic.number AS num, a.time, a.result = 'Accepted' AS succeeded
+                    SELECT
+                        a.user_id, pic.number AS num, a.time,
+                        a.verdict_code = {accepted} AS succeeded
                     FROM attempts a
                     JOIN problem_in_contests pic ON pic.id = a.problem_in_contest_id
                     WHERE pic.contest_id = %s
-                    AND a.result NOT IN ('', 'Queued', 'Compiling...', 'Compilation error', 'Ignored')
-                    AND a.result NOT LIKE 'Testing%%'
-                    AND a.result NOT LIKE 'System error%%'
+                    AND a.verdict_code >= {accepted}
                     AND a.time < %s
+                    {}
                 )
                 SELECT a.user_id, a.num - 1, COUNT(*), MAX(a.time), ok.user_id IS NOT NULL
                 FROM all_attempts a
@@ -36,7 +35,9 @@ class AcmStandingsBuilder(LastAttemptsMixin, BaseStandingsBuilder):
                 WHERE ok.succeeded_at IS NULL
                 OR a.time <= ok.succeeded_at
                 GROUP BY a.user_id, a.num, ok.user_id
-            """, [self.contest.id, self.contest.get_due_time(self.unfrozen)])
+            """.format(restriction, accepted=VERDICT_ACCEPTED), [
+                self.contest.id, self.get_due_time(),
+            ] + params)
 
             start_time = self.contest.start_time
             for user_id, problem_number, attempt_count, time, succeeded in cursor:
@@ -1,28 +1,40 @@
 from django.db import connection
 
 from .base             import BaseStandingsBuilder
+from .util             import restrict_to_cell, restrict_to_users
 from ..aggregators     import AcceptedCountRowAggregator
 from ..attempt_results import AcmTrainingAttemptResult
 
 
 class AcmTrainingStandingsBuilder(BaseStandingsBuilder):
-    def generate_attempts(self):
+    def generate_attempts(self, user_id=None, problem_number=None):
+        return self._generate(*restrict_to_cell(user_id, problem_number, 's'))
+
+    def generate_rows(self, user_ids):
+        return self._generate(*restrict_to_users(user_ids, 's'))
+
+    def _generate(self, restriction, params):
         with connection.cursor() as cursor:
-            # FIXME(nickolas): It's a hellish bottleneck to do this without a `LIMIT`.
             cursor.execute("""
-                SELECT a.user_id, pic.number - 1, MIN(a.result) = 'Accepted'
-                FROM attempts a
-                JOIN problem_in_contests pic ON pic.id = a.problem_in_contest_id
+                SELECT s.user_id, pic.number - 1, s.accepted
+                FROM attempt_summaries s
+                JOIN problem_in_contests pic ON pic.id = s.problem_in_contest_id
                 WHERE pic.contest_id = %s
-                AND a.result NOT IN ('', 'Queued', 'Compiling...', 'Compilation error', 'Ignored')
-                AND a.result NOT LIKE 'Testing%%'
-                AND a.result NOT LIKE 'System error%%'
-                GROUP BY a.user_id, pic.number
-            """, [self.contest.id])
+                {}
+            """.format(restriction), [self.contest.id] + params)
 
             for user_id, problem_number, succeeded in cursor:
                 yield AcmTrainingAttemptResult(user_id, problem_number, succeeded)
 
+    def get_totals_sql(self):
+        return """
+            SELECT s.user_id, COUNT(*) FILTER (WHERE s.accepted) AS total
+            FROM attempt_summaries s
+            JOIN problem_in_contests pic ON pic.id = s.problem_in_contest_id
+            WHERE pic.contest_id = %s
+            GROUP BY s.user_id
+        """, [self.contest.id]
+
     def get_row_aggregators(self):
         return [('solved', AcceptedCountRowAggregator())]
 
@@ -1,17 +1,80 @@
 import abc
 import collections
+import collections.abc
 import itertools
 
+from django.conf import settings
+
 from core.models    import ProblemInContest
 from misc.itertools import indexed_groupby
 from users.models   import User
+from ..aggregators  import AttemptBatch
+
+
+class RowExtras(collections.abc.MutableMapping):
+    """
+    An ordered mapping of a row's aggregation results, compact enough to have one per row.
+    Values are kept in a list; the tuple of keys is shared by all rows having the same keys.
+    """
+
+    __slots__ = ('_keys', '_values')
+
+    _layouts = { }
+
+    def __init__(self, items=()):
+        self._keys = ()
+        self._values = [ ]
+        for key, value in items:
+            self[key] = value
+
+    def __getitem__(self, key):
+        try:
+            return self._values[self._keys.index(key)]
+        except ValueError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        try:
+            self._values[self._keys.index(key)] = value
+        except ValueError:
+            layout = (self._keys, key)
+            keys = self._layouts.get(layout)
+            if keys is None:
+                self._layouts[layout] = keys = self._keys + (key, )
+            self._keys = keys
+            self._values.append(value)
+
+    def __delitem__(self, key):
+        try:
+            index = self._keys.index(key)
+        except ValueError:
+            raise KeyError(key) from None
+        self._keys = self._keys[:index] + self._keys[index + 1:]
+        del self._values[index]
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, list(self.items()))
+
+    def copy(self):
+        result = RowExtras()
+        result._keys = self._keys
+        result._values = list(self._values)
+        return result
 
 
 class StandingsRow:
+    __slots__ = ('user_id', 'username', 'rank', 'attempts', 'extras')
+
     def __init__(self, user_id, problem_count):
         self.user_id = user_id
         self.attempts = [None] * problem_count
-        self.extras = collections.OrderedDict()
+        self.extras = RowExtras()
 
 
 class BaseStandingsBuilder(abc.ABC):
@@ -19,8 +82,43 @@ class BaseStandingsBuilder(abc.ABC):
         self.contest = contest
 
     @abc.abstractmethod
-    def generate_attempts(self):
-        pass
+    def generate_attempts(self, user_id=None, problem_number=None):
+        """
+        Yields an attempt result for every (participant, problem) pair that has any.
+        If `user_id` and `problem_number` are given, only that single pair is considered.
+        """
+
+    def generate_rows(self, user_ids):
+        """
+        Yields attempt results of the given participants only. Used by builders that support
+        ranking in the database (see `get_totals_sql`), which should override it with a query
+        restricted to these participants: this one reads the results of everyone.
+        """
+
+        user_ids = set(user_ids)
+        return (attempt for attempt in self.generate_attempts() if attempt.user_id in user_ids)
+
+    def get_totals_sql(self):
+        """
+        Returns an SQL query (and its parameters) selecting `user_id` and `total` of every
+        participant, so that the table can be ranked by the database, or `None` if the builder
+        cannot rank this way. Participants are expected to be ordered by `total` descending,
+        then by their name, exactly as `get_total_ordering` does.
+        """
+
+        return None
+
+    def get_state_key(self):
+        """
+        Identifies the table being built: builders with equal keys produce the same standings.
+        """
+        return (type(self).__name__, self.contest.id)
+
+    def get_due_time(self):
+        return None
+
+    def is_frozen(self):
+        return False
 
     def get_row_aggregators(self):
         return [ ]
@@ -50,27 +148,68 @@ class BaseStandingsBuilder(abc.ABC):
     def get_total_ordering(self, row):
         return self.get_ordering(row) + self.get_extra_ordering(row)
 
+    def fetch_pics(self):
+        self.pics = list(
+            ProblemInContest
+            .objects
+            .filter(contest=self.contest)
+            .select_related('problem', 'contest')
+            .order_by('number')
+            .only('number', 'score', 'problem__name', 'contest__is_training')
+        )
+
+    @staticmethod
+    def fetch_usernames(user_ids):
+        return dict(
+            User
+            .objects
+            .filter(id__in=user_ids)
+            .values_list('id', 'username')
+        )
+
+    @staticmethod
+    def aggregate(aggregators, attempts):
+        if settings.STANDINGS['BATCH_AGGREGATION']:
+            batch = AttemptBatch(list(attempts))
+            for agtor in aggregators:
+                agtor.update_batch(batch)
+        else:
+            for attempt in attempts:
+                for agtor in aggregators:
+                    agtor.update(attempt)
+
     def build_table(self, aggregators):
         table = { }
-        for attempt in self.generate_attempts():
+        attempts = list(self.generate_attempts())
+        for attempt in attempts:
             row = table.get(attempt.user_id)
             if row is None:
                 table[attempt.user_id] = row = StandingsRow(attempt.user_id, len(self.pics))
             row.attempts[attempt.problem_number] = attempt
-            for agtor in aggregators:
-                agtor.update(attempt)
+        self.aggregate(aggregators, attempts)
+
+        return table
+
+    def rank(self, rows):
+        table = sorted(rows, key=self.get_total_ordering)
+        for i, j, k, g in indexed_groupby(table, self.get_ordering, start=1):
+            if i + 1 == j:
+                g[0].rank = str(i)
+            else:
+                rank = '%d-%d' % (i, j - 1)
+                for row in g:
+                    row.rank = rank
 
         return table
 
+    def postprocess(self, table, column_aggregations, other_aggregations):
+        for row in table:
+            self.postprocess_row_aggregations(row.extras)
+        self.postprocess_column_aggregations(column_aggregations)
+        self.postprocess_other_aggregations(other_aggregations)
+
     def build(self):
-        self.pics = list(
-            ProblemInContest
-            .objects
-            .filter(contest=self.contest)
-            .select_related('problem', 'contest')
-            .order_by('number')
-            .only('number', 'score', 'problem__name', 'contest__is_training')
-        )
+        self.fetch_pics()
         row_aggregators    = self.get_row_aggregators()
         column_aggregators = self.get_column_aggregators()
         other_aggregators  = self.get_other_aggregators()
@@ -79,12 +218,7 @@ class BaseStandingsBuilder(abc.ABC):
         )]
         table = self.build_table(all_aggregators)
 
-        self.usernames = dict(
-            User
-            .objects
-            .filter(id__in=table)
-            .values_list('id', 'username')
-        )
+        self.usernames = self.fetch_usernames(table)
         for user_id, username in self.usernames.items():
             table[user_id].username = username
 
@@ -93,24 +227,13 @@ class BaseStandingsBuilder(abc.ABC):
             for user_id, value in agtor.finalize().items():
                 table[user_id].extras[field_name] = value
 
-        table = sorted(table.values(), key=self.get_total_ordering)
-        for i, j, k, g in indexed_groupby(table, self.get_ordering, start=1):
-            if i + 1 == j:
-                g[0].rank = str(i)
-            else:
-                rank = '%d-%d' % (i, j - 1)
-                for row in g:
-                    row.rank = rank
-
+        table = self.rank(table.values())
         column_aggregations = collections.OrderedDict(
             [(name, agtor.finalize()) for name, agtor in column_aggregators]
         )
         other_aggregations = collections.OrderedDict(
             [(name, agtor.finalize()) for name, agtor in other_aggregators]
         )
-        for row in table:
-            self.postprocess_row_aggregations(row.extras)
-        self.postprocess_column_aggregations(column_aggregations)
-        self.postprocess_other_aggregations(other_aggregations)
+        self.postprocess(table, column_aggregations, other_aggregations)
 
         return self.pics, table, extras, column_aggregations, other_aggregations
@@ -1,18 +1,16 @@
 from django.db import connection
 
+from core.models       import VERDICT_TESTED
 from core.util         import format_time
 from .base             import BaseStandingsBuilder
-from .util             import LastAttemptsMixin
+from .util             import DueTimeMixin, LastAttemptsMixin, restrict_to_cell
 from ..aggregators     import *
 from ..attempt_results import TimedKirovAttemptResult
 
 
-class KirovStandingsBuilder(LastAttemptsMixin, BaseStandingsBuilder):
-    def __init__(self, contest, unfrozen):
-        super().__init__(contest)
-        self.unfrozen = unfrozen
-
-    def generate_attempts(self):
+class KirovStandingsBuilder(LastAttemptsMixin, DueTimeMixin, BaseStandingsBuilder):
+    def generate_attempts(self, user_id=None, problem_number=None):
+        restriction, params = restrict_to_cell(user_id, problem_number)
         with connection.cursor() as cursor:
             cursor.execute("""
                 WITH all_attempts AS (
@@ -20,8 +18,9 @@ class KirovStandingsBuilder(LastAttemptsMixin, BaseStandingsBuilder):
                     FROM attempts a
                     JOIN problem_in_contests pic ON pic.id = a.problem_in_contest_id
                     WHERE pic.contest_id = %s
-                    AND a.result = 'Tested'
+                    AND a.verdict_code = {tested}
                     AND a.time < %s
+                    {}
                 )
                 SELECT a.user_id, a.num - 1, COUNT(*), best.time, best.score * .01
                 FROM all_attempts a
@@ -32,7 +31,9 @@ class KirovStandingsBuilder(LastAttemptsMixin, BaseStandingsBuilder):
                 ) best ON best.user_id = a.user_id AND best.num = a.num
                 WHERE a.time <= best.time
                 GROUP BY a.user_id, a.num, best.time, best.score
-            """, [self.contest.id, self.contest.get_due_time(self.unfrozen)])
+            """.format(restriction, tested=VERDICT_TESTED), [
+                self.contest.id, self.get_due_time(),
+            ] + params)
 
             start_time = self.contest.start_time
             for user_id, problem_number, attempt_count, time, score in cursor:
@@ -1,26 +1,45 @@
 from django.db import connection
 
 from .base             import BaseStandingsBuilder
+from .util             import restrict_to_cell, restrict_to_users
 from ..aggregators     import ScoreRowAggregator
 from ..attempt_results import KirovTrainingAttemptResult
 
 
 class KirovTrainingStandingsBuilder(BaseStandingsBuilder):
-    def generate_attempts(self):
+    def generate_attempts(self, user_id=None, problem_number=None):
+        return self._generate(*restrict_to_cell(user_id, problem_number, 's'))
+
+    def generate_rows(self, user_ids):
+        return self._generate(*restrict_to_users(user_ids, 's'))
+
+    def _generate(self, restriction, params):
         with connection.cursor() as cursor:
-            # FIXME(nickolas): It's a hellish bottleneck to do this without a `LIMIT`.
             cursor.execute("""
-                SELECT a.user_id, pic.number - 1, MAX(a.score) * .01
-                FROM attempts a
-                JOIN problem_in_contests pic ON pic.id = a.problem_in_contest_id
+                SELECT s.user_id, pic.number - 1, s.best_score * .01
+                FROM attempt_summaries s
+                JOIN problem_in_contests pic ON pic.id = s.problem_in_contest_id
                 WHERE pic.contest_id = %s
-                AND a.result = 'Tested'
-                GROUP BY a.user_id, pic.number
-            """, [self.contest.id])
+                AND s.best_score IS NOT NULL
+                {}
+            """.format(restriction), [self.contest.id] + params)
 
             for user_id, problem_number, score in cursor:
                 yield KirovTrainingAttemptResult(user_id, problem_number, score)
 
+    def get_totals_sql(self):
+        # Rounded, so that equal scores summed up in a different order are still equal.
+        return """
+            SELECT s.user_id, ROUND(SUM(
+                CASE WHEN s.best_score >= .01 THEN LEAST(s.best_score * .01, 1) * pic.score ELSE 0 END
+            )::numeric, 6) AS total
+            FROM attempt_summaries s
+            JOIN problem_in_contests pic ON pic.id = s.problem_in_contest_id
+            WHERE pic.contest_id = %s
+            AND s.best_score IS NOT NULL
+            GROUP BY s.user_id
+        """, [self.contest.id]
+
     def get_row_aggregators(self):
         return [('score', ScoreRowAggregator([pic.score for pic in self.pics]))]
 
@@ -28,7 +47,8 @@ class KirovTrainingStandingsBuilder(BaseStandingsBuilder):
         odict['score'] = '%.2f' % odict['score']
 
     def get_ordering(self, row):
-        return (-row.extras['score'], )
+        # Rounded for the same reason as in `get_totals_sql`.
+        return (-round(row.extras['score'], 6), )
 
     def get_extra_ordering(self, row):
         return (row.username, row.user_id)
@@ -1,6 +1,38 @@
+from django.utils import timezone
+
 from ..aggregators import LastAcceptedAggregator, LastSubmittedAggregator
 
 
+def restrict_to_cell(user_id, problem_number, table='a'):
+    """
+    Returns an SQL condition (and its parameters) narrowing attempts (or their summaries)
+    `table` joined with problems in contest `pic` down to a single standings cell.
+    """
+
+    if user_id is None:
+        return '', [ ]
+    return 'AND %s.user_id = %%s AND pic.number = %%s' % table, [user_id, problem_number + 1]
+
+
+def restrict_to_users(user_ids, table='a'):
+    return 'AND %s.user_id = ANY(%%s)' % table, [list(user_ids)]
+
+
+class DueTimeMixin:
+    def __init__(self, contest, unfrozen):
+        super().__init__(contest)
+        self.unfrozen = unfrozen
+
+    def get_due_time(self):
+        return self.contest.get_due_time(self.unfrozen)
+
+    def get_state_key(self):
+        return super().get_state_key() + (self.unfrozen, )
+
+    def is_frozen(self):
+        return not self.unfrozen and self.contest.is_frozen_at(timezone.now())
+
+
 class LastAttemptsMixin:
     def get_other_aggregators(self):
         return [
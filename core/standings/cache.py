@@ -0,0 +1,89 @@
+"""
+A cache of built standings tables.
+
+Only tables with a fixed due time are cached: frozen standings and standings of finished
+contests. They change on rejudges only, which is exactly what
+`Contest.standings_version` tracks: it is incremented whenever an attempt or a problem of the
+contest changes in a way that can affect such a table (see `core.signals`). Since both the
+version and the due time are parts of a cache key, a stale entry is never looked up again and
+simply gets evicted eventually. Trainings are never cached: new attempts keep changing them,
+and their standings are cheap to build from attempt summaries anyway.
+
+Tables are kept in the `standings` cache; its `MAX_ENTRIES` and `TIMEOUT` options bound the
+cache size and the lifetime of entries, respectively. The latter also limits how long changes
+made bypassing the ORM (and thus not incrementing the version) remain unnoticed.
+"""
+
+from django.core.cache import caches
+from django.db         import connection
+from django.db.models  import F
+
+from core.models import Contest
+
+
+def get_key(builder):
+    """
+    Returns a cache key for the table being built, or `None` if it should not be cached.
+    """
+
+    contest = builder.contest
+    due_time = builder.get_due_time()
+    if due_time is None:
+        return None  # A training, which changes with every attempt.
+    if not builder.is_frozen() and due_time < contest.finish_time:
+        return None  # The contest is running and its standings change every moment.
+
+    return 'standings:%s:%s:%d:%s' % (
+        ':'.join(map(str, builder.get_state_key())),
+        due_time.timestamp(),
+        contest.standings_version,
+        contest.updated_at.timestamp(),
+    )
+
+
+def get_standings(builder, build):
+    key = get_key(builder)
+    if key is None:
+        return build(builder)
+
+    cache = caches['standings']
+    result = cache.get(key)
+    if result is None:
+        result = build(builder)
+        cache.set(key, result)
+    return result
+
+
+def invalidate_contest(contest_id):
+    Contest.objects.filter(id=contest_id).update(standings_version=F('standings_version') + 1)
+
+
+def invalidate_attempts(changes):
+    """
+    Increments the version of every contest the attempts were sent to, given as (pic_id, time)
+    pairs, except for trainings and attempts sent after freezing time of a contest that
+    is still running (such attempts only affect standings that are never cached).
+    """
+
+    changes = list(changes)
+    if not changes:
+        return
+
+    pic_ids, moments = zip(*changes)
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            UPDATE contests c
+            SET standings_version = c.standings_version + 1
+            WHERE c.id IN (
+                SELECT pic.contest_id
+                FROM unnest(%s::int[], %s::timestamptz[]) a(pic_id, time)
+                JOIN problem_in_contests pic ON pic.id = a.pic_id
+                JOIN contests c ON c.id = pic.contest_id
+                WHERE NOT c.is_training
+                AND (
+                    c.freezing_time IS NULL
+                    OR a.time < c.start_time + c.freezing_time * interval '1 minute'
+                    OR now() >= c.start_time + c.duration * interval '1 minute'
+                )
+            )
+        """, [list(pic_ids), list(moments)])
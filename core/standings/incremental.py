@@ -0,0 +1,265 @@
+"""
+Incremental standings. Instead of building a table from scratch on every request, a
+`StandingsState` keeps it in memory and updates it in place when attempts change.
+
+A change is applied cell by cell: the builder's `generate_attempts` is narrowed down to a
+single (participant, problem) pair, then row aggregations are recalculated for the affected
+participant only, column ones - for the affected problem only. Common aggregations and ranks
+are recalculated over the cells kept in memory, without touching the database.
+
+Attempts saved by this process are applied as soon as they are committed (see `core.signals`).
+Changes made elsewhere (by the tester or by other workers) are discovered on read via
+`Attempt.updated_at`.
+Whatever is not reflected in `updated_at` (e.g., renamed users) is picked up when the state
+expires and gets rebuilt, which happens every `STANDINGS['INCREMENTAL_MAX_AGE']` seconds.
+"""
+
+import collections
+import copy
+import threading
+
+from django.conf      import settings
+from django.db.models import Max
+from django.utils     import timezone
+
+from core.models    import Attempt
+from .builders.base import RowExtras, StandingsRow
+
+
+class StandingsState:
+    # Transactions may commit in an order different from their `updated_at`, so a short period
+    # before the watermark is re-examined on every refresh.
+    LAG = timezone.timedelta(seconds=30)
+
+    def __init__(self, builder):
+        self.builder = builder
+        self.lock = threading.RLock()
+        self.contest_updated_at = builder.contest.updated_at
+        self.frozen = builder.is_frozen()
+        self.built_at = timezone.now()
+        self.watermark = self._fetch_watermark()
+        self.seen = dict(
+            self._fetch_changes()
+            .values_list('id', 'updated_at')
+        )
+
+        builder.fetch_pics()
+        self.problem_count = len(builder.pics)
+        self.extras = [name for name, agtor in builder.get_row_aggregators()]
+        self.rows = builder.build_table([])
+        builder.usernames = builder.fetch_usernames(self.rows)
+        for user_id, username in builder.usernames.items():
+            self.rows[user_id].username = username
+
+        self.columns = collections.OrderedDict(
+            [(name, [None] * self.problem_count) for name, agtor in builder.get_column_aggregators()]
+        )
+        self.dirty_users = set(self.rows)
+        self.dirty_problems = set(range(self.problem_count))
+        self._recalculate()
+
+    def _fetch_watermark(self):
+        return (
+            Attempt
+            .objects
+            .filter(problem_in_contest__contest=self.builder.contest)
+            .aggregate(m=Max('updated_at'))
+        )['m'] or self.built_at
+
+    def _fetch_changes(self):
+        return (
+            Attempt
+            .objects
+            .filter(
+                problem_in_contest__contest=self.builder.contest,
+                updated_at__gte=self.watermark - self.LAG,
+            )
+        )
+
+    def is_valid_for(self, builder):
+        max_age = timezone.timedelta(seconds=settings.STANDINGS['INCREMENTAL_MAX_AGE'])
+        return (
+            self.contest_updated_at == builder.contest.updated_at and
+            self.frozen == builder.is_frozen() and
+            timezone.now() - self.built_at < max_age
+        )
+
+    def _update_cell(self, user_id, problem_number):
+        attempts = list(self.builder.generate_attempts(user_id, problem_number))
+        attempt = attempts[0] if attempts else None
+        row = self.rows.get(user_id)
+        if row is None:
+            if attempt is None:
+                return
+            usernames = self.builder.usernames
+            if user_id not in usernames:
+                usernames.update(self.builder.fetch_usernames([user_id]))
+            self.rows[user_id] = row = StandingsRow(user_id, self.problem_count)
+            row.username = usernames[user_id]
+
+        row.attempts[problem_number] = attempt
+        if all(a is None for a in row.attempts):
+            del self.rows[user_id]
+        self.dirty_users.add(user_id)
+        self.dirty_problems.add(problem_number)
+
+    def _recalculate(self):
+        builder = self.builder
+        for user_id in self.dirty_users:
+            row = self.rows.get(user_id)
+            if row is None:
+                continue
+            aggregators = builder.get_row_aggregators()
+            builder.aggregate(
+                [agtor for name, agtor in aggregators], [a for a in row.attempts if a is not None],
+            )
+            row.extras = RowExtras(
+                [(name, agtor.finalize()[user_id]) for name, agtor in aggregators]
+            )
+
+        if self.dirty_problems:
+            aggregators = builder.get_column_aggregators()
+            builder.aggregate([agtor for name, agtor in aggregators], [
+                row.attempts[problem_number]
+                for row in self.rows.values()
+                for problem_number in self.dirty_problems
+                if row.attempts[problem_number] is not None
+            ])
+            for name, agtor in aggregators:
+                values = list(agtor.finalize())
+                column = self.columns[name]
+                for problem_number in self.dirty_problems:
+                    column[problem_number] = values[problem_number]
+
+        aggregators = builder.get_other_aggregators()
+        if aggregators:
+            builder.aggregate([agtor for name, agtor in aggregators], [
+                attempt
+                for row in self.rows.values()
+                for attempt in row.attempts
+                if attempt is not None
+            ])
+        self.others = [(name, agtor.finalize()) for name, agtor in aggregators]
+
+        self.table = builder.rank(self.rows.values())
+        self.dirty_users.clear()
+        self.dirty_problems.clear()
+        self.snapshot = None
+
+    def update(self, cells):
+        """
+        Re-reads the given (user_id, problem_number) cells from the database.
+        """
+
+        with self.lock:
+            for user_id, problem_number in cells:
+                if problem_number < self.problem_count:
+                    self._update_cell(user_id, problem_number)
+            if self.dirty_users:
+                self._recalculate()
+
+    def apply(self, changes):
+        """
+        Applies changes of attempts, given as (attempt_id, updated_at, cell) triples.
+        """
+
+        with self.lock:
+            for attempt_id, updated_at, cell in changes:
+                self.seen[attempt_id] = updated_at
+            self.update([cell for attempt_id, updated_at, cell in changes])
+
+    def refresh(self):
+        """
+        Applies changes made by other processes since the last refresh.
+        """
+
+        with self.lock:
+            changes = (
+                self._fetch_changes()
+                .values_list('id', 'updated_at', 'user', 'problem_in_contest__number')
+            )
+            cells = set()
+            for attempt_id, updated_at, user_id, number in changes:
+                if self.seen.get(attempt_id) != updated_at:
+                    self.seen[attempt_id] = updated_at
+                    cells.add((user_id, number - 1))
+                    self.watermark = max(self.watermark, updated_at)
+
+            horizon = self.watermark - self.LAG
+            self.seen = {k: v for k, v in self.seen.items() if v >= horizon}
+            self.update(cells)
+
+    def get_standings(self):
+        """
+        Returns the same as `BaseStandingsBuilder.build` would. The result must not be modified.
+        """
+
+        with self.lock:
+            if self.snapshot is None:
+                table = [ ]
+                for row in self.table:
+                    row = copy.copy(row)
+                    row.extras = row.extras.copy()
+                    table.append(row)
+                column_aggregations = collections.OrderedDict(
+                    [(name, list(values)) for name, values in self.columns.items()]
+                )
+                other_aggregations = collections.OrderedDict(self.others)
+                self.builder.postprocess(table, column_aggregations, other_aggregations)
+                self.snapshot = (
+                    self.builder.pics, table, self.extras, column_aggregations, other_aggregations,
+                )
+
+            return self.snapshot
+
+
+_states = collections.OrderedDict()
+_states_lock = threading.Lock()
+
+
+def get_state(builder):
+    key = builder.get_state_key()
+    with _states_lock:
+        state = _states.get(key)
+        if state is not None:
+            _states.move_to_end(key)
+
+    if state is not None and state.is_valid_for(builder):
+        state.refresh()
+    else:
+        state = StandingsState(builder)
+        with _states_lock:
+            _states[key] = state
+            while len(_states) > settings.STANDINGS['INCREMENTAL_MAX_CONTESTS']:
+                _states.popitem(last=False)
+    return state
+
+
+def get_standings(builder):
+    return get_state(builder).get_standings()
+
+
+def notify(changes):
+    """
+    Applies changes of attempts made by the current process to all the affected states. Changes
+    are given as (attempt_id, updated_at, contest_id, user_id, problem_number) tuples.
+    """
+
+    by_contest = collections.defaultdict(list)
+    for attempt_id, updated_at, contest_id, user_id, problem_number in changes:
+        by_contest[contest_id].append((attempt_id, updated_at, (user_id, problem_number)))
+    with _states_lock:
+        states = [s for s in _states.values() if s.builder.contest.id in by_contest]
+    for state in states:
+        state.apply(by_contest[state.builder.contest.id])
+
+
+def forget(contest_id):
+    with _states_lock:
+        for key, state in list(_states.items()):
+            if state.builder.contest.id == contest_id:
+                del _states[key]
+
+
+def is_active():
+    return bool(_states)
@@ -0,0 +1,112 @@
+"""
+Paginated standings. Participants are ordered and ranked by the database (see
+`BaseStandingsBuilder.get_totals_sql`), so only the requested page of the table is ever
+built in Python.
+"""
+
+import collections
+
+from django.db import connection
+
+from .builders.base import StandingsRow
+
+
+class RankedStandings:
+    """
+    A lazy sequence of standings rows, suitable for Django's `Paginator`.
+    """
+
+    RANKED_SQL = """
+        WITH totals AS ({}),
+        ranked AS (
+            SELECT
+                t.user_id, u.username,
+                RANK() OVER (ORDER BY t.total DESC) AS rank,
+                COUNT(*) OVER (PARTITION BY t.total) AS tied,
+                ROW_NUMBER() OVER (
+                    ORDER BY t.total DESC, u.username COLLATE "C", t.user_id
+                ) AS position
+            FROM totals t
+            JOIN users u ON u.id = t.user_id
+        )
+    """
+
+    def __init__(self, builder):
+        self.builder = builder
+        self.totals_sql, self.totals_params = builder.get_totals_sql()
+        builder.fetch_pics()
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT COUNT(*) FROM (%s) t' % self.totals_sql, self.totals_params,
+                )
+                self._count = cursor.fetchone()[0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def locate(self, user_id):
+        """
+        Returns the zero-based position of the participant in the table, or `None`.
+        """
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                self.RANKED_SQL.format(self.totals_sql) + """
+                    SELECT position - 1 FROM ranked WHERE user_id = %s
+                """,
+                self.totals_params + [user_id],
+            )
+            row = cursor.fetchone()
+        return row[0] if row is not None else None
+
+    def _fetch(self, offset, limit):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                self.RANKED_SQL.format(self.totals_sql) + """
+                    SELECT user_id, username, rank, tied
+                    FROM ranked
+                    WHERE position > %s
+                    ORDER BY position
+                    LIMIT %s
+                """,
+                self.totals_params + [offset, limit],
+            )
+            return cursor.fetchall()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+
+        start, stop, step = index.indices(self.count())
+        assert step == 1, 'Stepped slices are not supported'
+        if start >= stop:
+            return [ ]
+
+        builder = self.builder
+        problem_count = len(builder.pics)
+        table = collections.OrderedDict()
+        for user_id, username, rank, tied in self._fetch(start, stop - start):
+            table[user_id] = row = StandingsRow(user_id, problem_count)
+            row.username = username
+            row.rank = str(rank) if tied == 1 else '%d-%d' % (rank, rank + tied - 1)
+
+        attempts = list(builder.generate_rows(table))
+        for attempt in attempts:
+            table[attempt.user_id].attempts[attempt.problem_number] = attempt
+        row_aggregators = builder.get_row_aggregators()
+        builder.aggregate([agtor for name, agtor in row_aggregators], attempts)
+        for name, agtor in row_aggregators:
+            for user_id, value in agtor.finalize().items():
+                table[user_id].extras[name] = value
+        for row in table.values():
+            builder.postprocess_row_aggregations(row.extras)
+
+        return list(table.values())
+
+    def get_extras(self):
+        return [name for name, agtor in self.builder.get_row_aggregators()]
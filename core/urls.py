@@ -19,9 +19,9 @@ urlpatterns = (
     _url(r'^(?P<contest_id>\d+)/(?P<problem_number>\d+)/submit/?$', SubmitView, 'submit'),
     _url(r'^(?P<contest_id>\d+)/submit/?$', SubmitView, 'submit'),
     _url(r'^(?P<contest_id>\d+)/attempts/?$', AttemptsView, 'attempts'),
-    _url(r'^(?P<contest_id>\d+)/attempts/(?P<page>\d+)/?$', AttemptsView, 'attempts'),
     _url(r'^attempt/(?P<attempt_id>\d+)/?$', AttemptDetailsView, 'attempt'),
     _url(r'^(?P<contest_id>\d+)/standings/?$', StandingsView, 'standings'),
+    _url(r'^(?P<contest_id>\d+)/standings/(?P<page>\d+|me)/?$', StandingsView, 'standings'),
     _url(r'^(?P<contest_id>\d+)/standings\.xml/?$', XMLStandingsView, 'standings-xml'),
     _url(r'^(?P<contest_id>\d+)/unfrozen-standings/?$', UnfrozenStandingsView, 'standings-unfrozen'),
     _url(r'^(?P<contest_id>\d+)/unfrozen-standings\.xml/?$', UnfrozenXMLStandingsView, 'standings-xml-unfrozen'),
@@ -3,17 +3,19 @@ from django.core.exceptions     import PermissionDenied
 from django.http                import Http404
 from django.views.generic       import TemplateView, ListView
 
-from .util       import NotificationListMixin, SelectContestMixin, get_relative_time_info
-from core.models import Attempt, TestInfo
+from .util       import (
+    KeysetPaginationMixin, NotificationListMixin, SelectContestMixin, get_relative_time_info,
+)
+from core.models import Attempt
 from core.util   import highlight_source
 
 
-class AttemptsView(LoginRequiredMixin, SelectContestMixin, NotificationListMixin, ListView):
+class AttemptsView(LoginRequiredMixin, SelectContestMixin, NotificationListMixin,
+                   KeysetPaginationMixin, ListView):
     template_name = 'contests/attempts.html'
     context_object_name = 'attempts'
     allow_empty = True
     paginate_by = 25
-    paginate_orphans = 1
 
     # FIXME(nickolas): A contest is fetched twice.
     def get_queryset(self):
@@ -23,7 +25,6 @@ class AttemptsView(LoginRequiredMixin, SelectContestMixin, NotificationListMixin
             .objects
             .filter(problem_in_contest__contest=contest, user=self.request.user)
             .select_related('problem_in_contest__problem', 'compiler')
-            .order_by('-created_at')
         )
         return attempts
 
@@ -53,7 +54,8 @@ class AttemptDetailsView(LoginRequiredMixin, NotificationListMixin, TemplateView
                 Attempt
                 .objects
                 .select_related(
-                    'compiler', 'problem_in_contest__problem', 'problem_in_contest__contest',
+                    'compiler', 'source_blob', 'output',
+                    'problem_in_contest__problem', 'problem_in_contest__contest',
                 )
                 .get(id=attempt_id)
             )
@@ -65,16 +67,7 @@ class AttemptDetailsView(LoginRequiredMixin, NotificationListMixin, TemplateView
         if user.id != attempt.user_id and not user.is_staff:
             raise PermissionDenied('Вы не можете просматривать исходный код чужих посылок.')
 
-        if attempt.contest.is_school:
-            test_infos = list(
-                TestInfo
-                .objects
-                .filter(attempt=attempt)
-                .order_by('test_number')
-                .only('result', 'used_time', 'used_memory')
-            )
-        else:
-            test_infos = None
+        test_infos = attempt.tests if attempt.contest.is_school else None
 
         source, styles = highlight_source(attempt.source, attempt.compiler.highlighter)
         context.update(
@@ -1,8 +1,14 @@
+import collections
+
+from django.conf          import settings
+from django.core          import paginator as pg
 from django.http          import Http404
 from django.views.generic import TemplateView
 
+from core.standings          import cache, incremental
+from core.standings.pages    import RankedStandings
 from core.standings.builders import (
-    AcmStandingsBuilder, AcmTrainingStandingsBuilder,
+    AcmStandingsBuilder, AcmTrainingStandingsBuilder, BaseStandingsBuilder,
     KirovStandingsBuilder, KirovTrainingStandingsBuilder,
 )
 from .util import NotificationListMixin, SelectContestMixin, get_relative_time_info
@@ -25,8 +31,26 @@ class StandingsView(SelectContestMixin, NotificationListMixin, TemplateView):
         else:
             builder = AcmStandingsBuilder(contest, self.unfrozen)
 
-        pics, standings, extras, statistics, summary = builder.build()
         context = super().get_context_data(**kwargs)
+        if settings.STANDINGS['PAGINATE_BY'] and builder.get_totals_sql() is not None:
+            standings = RankedStandings(builder)
+            page_obj = self.paginate(standings)
+            context.update(
+                paginator=page_obj.paginator,
+                page_obj=page_obj,
+                is_paginated=page_obj.has_other_pages(),
+            )
+            pics = builder.pics
+            extras = standings.get_extras()
+            standings = page_obj.object_list
+            statistics = summary = collections.OrderedDict()
+        else:
+            if settings.STANDINGS['INCREMENTAL']:
+                build = incremental.get_standings
+            else:
+                build = BaseStandingsBuilder.build
+            pics, standings, extras, statistics, summary = cache.get_standings(builder, build)
+
         context.update(
             contest=contest,
             time_info=time_info,
@@ -40,6 +64,21 @@ class StandingsView(SelectContestMixin, NotificationListMixin, TemplateView):
         )
         return context
 
+    def paginate(self, standings):
+        paginator = pg.Paginator(standings, settings.STANDINGS['PAGINATE_BY'], orphans=1)
+        page = self.kwargs.get('page') or 1
+        if page == 'me':
+            user = self.request.user
+            position = standings.locate(user.id) if user.is_authenticated else None
+            if position is not None:
+                page = min(position // paginator.per_page + 1, paginator.num_pages)
+            else:
+                page = 1
+        try:
+            return paginator.page(page)
+        except pg.InvalidPage:
+            raise Http404('Не существует запрошенной страницы')
+
 
 class UnfrozenStandingsView(StandingsView):
     unfrozen = True
@@ -1,8 +1,9 @@
 import abc
 import collections
 
-from django.http  import Http404
-from django.utils import timezone
+from django.db.models import Q
+from django.http      import Http404
+from django.utils     import timezone
 
 from core.models import Contest, Notification
 
@@ -73,6 +74,70 @@ class SelectContestMixin:
             raise Http404('Не существует тренировки с запрошенным id.')
 
 
+KeysetPage = collections.namedtuple('KeysetPage', 'object_list newer older')
+
+
+class KeysetPaginationMixin:
+    """
+    Paginates a `ListView` newest first by (`created_at`, `id`) instead of page numbers, so that
+    a deep page costs the same as the first one and no total count is needed. A page is
+    requested by `?before=` (older) or `?after=` (newer) a key taken from `page_obj`.
+    """
+
+    _EPOCH = timezone.datetime(1970, 1, 1, tzinfo=timezone.utc)
+    _MICROSECOND = timezone.timedelta(microseconds=1)
+    # IDs are `serial`, larger ones would overflow in the database.
+    _MAX_ID = 2 ** 31 - 1
+
+    @classmethod
+    def _encode_key(cls, obj):
+        return '%d-%d' % ((obj.created_at - cls._EPOCH) // cls._MICROSECOND, obj.id)
+
+    @classmethod
+    def _decode_key(cls, key):
+        try:
+            created_at, id = key.split('-')
+            created_at, id = cls._EPOCH + int(created_at) * cls._MICROSECOND, int(id)
+        except (ValueError, OverflowError):
+            raise Http404('Не существует запрошенной страницы')
+        if id > cls._MAX_ID:
+            raise Http404('Не существует запрошенной страницы')
+        return created_at, id
+
+    def paginate_queryset(self, queryset, page_size):
+        before = self.request.GET.get('before')
+        after = self.request.GET.get('after')
+        if before is not None:
+            created_at, id = self._decode_key(before)
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=id)
+            )
+        elif after is not None:
+            created_at, id = self._decode_key(after)
+            queryset = queryset.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=id)
+            )
+
+        if after is None:
+            objects = list(queryset.order_by('-created_at', '-id')[:page_size + 1])
+            has_newer = before is not None
+            has_older = len(objects) > page_size
+            del objects[page_size:]
+        else:
+            objects = list(queryset.order_by('created_at', 'id')[:page_size + 1])
+            has_newer = len(objects) > page_size
+            has_older = True
+            del objects[page_size:]
+            objects.reverse()
+
+        page = KeysetPage(
+            objects,
+            self._encode_key(objects[0]) if objects and has_newer else None,
+            self._encode_key(objects[-1]) if objects and has_older else None,
+        )
+        return None, page, objects, page.newer is not None or page.older is not None
+
+
 class StandingsDueTimeMixinABC(abc.ABC):
     @abc.abstractmethod
     def get_due_time(self, contest):
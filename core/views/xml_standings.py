@@ -1,12 +1,20 @@
-import io
+import gzip
+import hashlib
 import uuid
 from   xml.sax import saxutils
 
-from django.db.models             import F, Func, CharField, BigIntegerField
+from django.conf                  import settings
+from django.core.cache            import caches
+from django.db                    import connection, transaction
+from django.db.models             import F, Func, Count, Max, Q, CharField, BigIntegerField
 from django.db.models.expressions import RawSQL
 from django.db.models.functions   import Cast
-from django.http                  import HttpResponse, Http404
+from django.http                  import (
+    Http404, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse,
+)
 from django.utils                 import timezone
+from django.utils.cache           import get_conditional_response, patch_vary_headers
+from django.utils.http            import http_date
 from django.views.generic         import View
 
 from .util import (
@@ -17,10 +25,61 @@ from core.models import Attempt, ProblemInContest
 
 
 class BaseXMLStandingsView(StandingsDueTimeMixinABC, SelectContestMixin, View):
+    """
+    The ejudge runlog of a contest.
+
+    Every runlog carries a `next_since` token. Passing it back as `?since=<token>` gives a delta
+    runlog: only runs changed or made visible since the token was issued, with their users and
+    languages. Runs are identified by `run_id`, so clients should replace runs they already
+    have. Deleted attempts are not reported; neither are changes of the contest itself, which
+    is why a full runlog is returned if the contest has been modified since the token. The
+    `delta` attribute of `<runlog>` tells the two apart: it is "yes" for a delta runlog and "no"
+    for a full one, so clients should drop the runs they have when they get the latter.
+
+    Runlogs support conditional requests: the ETag is derived from the contest, its problems
+    and the number and the latest `updated_at` of the runs included. It is weak, since the same
+    runlog may be sent gzipped or not, and since `current_time` is not part of it: a runlog
+    served from the cache or revalidated with a 304 keeps the `current_time` of the request it
+    was first rendered for. Renaming a user is not reflected until some run changes. Rendered
+    runlogs are also kept in the `runlog` cache (together with a gzipped copy), unless they
+    exceed `STANDINGS['RUNLOG_CACHE_MAX_SIZE']`.
+    """
+
+    # Approximate size of runlog chunks sent to the client, in bytes.
+    CHUNK_SIZE = 64 * 1024
+    # Transactions may commit in an order different from their `updated_at`, so runs changed
+    # within this period before the token are sent again.
+    SINCE_LAG = timezone.timedelta(seconds=30)
+    _EPOCH = timezone.datetime(1970, 1, 1, tzinfo=timezone.utc)
+    _MICROSECOND = timezone.timedelta(microseconds=1)
+    # Run UUIDs are derived from attempt IDs, so that runlogs of the same runs differ only in
+    # `current_time`.
+    _RUN_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, 'lerna:attempt')
+
     @staticmethod
     def _encode_datetime(moment):
         return timezone.localtime(moment).strftime('%Y/%m/%d %H:%M:%S').encode()
 
+    @classmethod
+    def _encode_token(cls, updated_at, due_time):
+        return '%d-%d' % (
+            (updated_at - cls._EPOCH) // cls._MICROSECOND,
+            (due_time - cls._EPOCH) // cls._MICROSECOND,
+        )
+
+    @classmethod
+    def _decode_token(cls, token):
+        """
+        Returns the latest `updated_at` and the due time encoded in the token.
+        Raises `ValueError` if the token is malformed.
+        """
+
+        updated_at, due_time = token.split('-')
+        return (
+            cls._EPOCH + int(updated_at) * cls._MICROSECOND,
+            cls._EPOCH + int(due_time) * cls._MICROSECOND,
+        )
+
     # TODO: use is_staff mixin instead, when it is ready
     def dispatch(self, request, *args, **kwargs):
         if not request.user.is_staff:
@@ -44,93 +103,214 @@ class BaseXMLStandingsView(StandingsDueTimeMixinABC, SelectContestMixin, View):
             .order_by('number')
             .values_list('id', 'letter', 'problem__name')
         )
+        due_time = self.get_due_time(contest)
         attempts = (
             Attempt
             .objects
             .filter(
                 problem_in_contest__in=[pic_id for pic_id, letter, name in pics],
-                time__lt=self.get_due_time(contest),
+                time__lt=due_time,
+            )
+            .order_by()
+        )
+        since = request.GET.get('since')
+        if since is not None:
+            try:
+                since, since_due_time = self._decode_token(since)
+            except (ValueError, OverflowError):
+                return HttpResponseBadRequest('Malformed since token')
+            if since >= contest.updated_at:
+                # Runs that were changed, or have just been unfrozen.
+                attempts = attempts.filter(
+                    Q(updated_at__gte=since - self.SINCE_LAG) | Q(time__gte=since_due_time)
+                )
+            else:
+                since = None
+        state = attempts.aggregate(updated_at=Max('updated_at'), count=Count('id'))
+        last_modified = max(
+            t for t in (state['updated_at'], since, contest.updated_at) if t is not None
+        )
+        next_since = self._encode_token(last_modified, due_time)
+
+        etag = hashlib.sha1(repr((
+            type(self).__name__, contest.id, contest.updated_at, pics,
+            request.GET.get('since'), state['count'], state['updated_at'],
+        )).encode()).hexdigest()
+        cache_key = 'runlog:' + etag
+        etag = 'W/"%s"' % etag
+        response = get_conditional_response(
+            request, etag=etag, last_modified=int(last_modified.timestamp()),
+        )
+        if response is None:
+            cached = caches['runlog'].get(cache_key)
+            compressed = (
+                cached is not None and 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+            )
+            response = self._respond(
+                contest, pics, attempts, since is not None, next_since, cached, compressed,
+                cache_key,
             )
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+        patch_vary_headers(response, ['Accept-Encoding'])
+        return response
+
+    def _respond(self, contest, pics, attempts, delta, next_since, cached, compressed, cache_key):
+        if cached is not None:
+            response = HttpResponse(cached[compressed], content_type='application/xml')
+            if compressed:
+                response['Content-Encoding'] = 'gzip'
+            return response
+
+        users = (
+            attempts
+            .values_list('user', 'user__username')
+            .distinct()
+        )
+        compilers = (
+            attempts
+            .values_list('compiler', 'compiler__codename', 'compiler__name')
+            .distinct()
+        )
+        runs = (
+            attempts
             .annotate(
                 submit_time_sec=RawSQL('extract(epoch FROM time - %s)', [contest.start_time]),
                 time_ns=Cast(F('used_time') * 1000000000 + 0.5, BigIntegerField()),
             )
             # .order_by('time')
             .values_list(
-                'id', 'submit_time_sec', 'result', 'score', 'time_ns',
-                'user', 'user__username',
-                'problem_in_contest',
-                'compiler', 'compiler__codename', 'compiler__name',
+                'id', 'submit_time_sec', 'verdict_code', 'test_number', 'score', 'time_ns',
+                'user', 'problem_in_contest', 'compiler',
             )
         )
-        users = { }
-        compilers = { }
-        a = io.BytesIO()
+        return StreamingHttpResponse(
+            self._cache_runlog(cache_key, self._read_consistently(
+                self._generate_runlog(contest, pics, users, compilers, runs, delta, next_since),
+            )),
+            content_type='application/xml',
+        )
+
+    @staticmethod
+    def _read_consistently(chunks):
+        """
+        Passes the chunks through, generating them in a read-only transaction of its own, so that
+        users, languages and runs are all read from the same snapshot: otherwise, a run of a user
+        (or in a language) that appeared after users (or languages) were read could be sent.
+        """
+
+        outermost = not connection.in_atomic_block
+        with transaction.atomic():
+            if outermost:
+                with connection.cursor() as cursor:
+                    cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY')
+            yield from chunks
+
+    @staticmethod
+    def _cache_runlog(cache_key, chunks):
+        """
+        Passes the chunks through, caching the whole runlog once it is complete.
+        """
+
+        body = [ ]
+        size = 0
+        max_size = settings.STANDINGS['RUNLOG_CACHE_MAX_SIZE']
+        for chunk in chunks:
+            if body is not None:
+                size += len(chunk)
+                if size <= max_size:
+                    body.append(chunk)
+                else:
+                    body = None
+            yield chunk
+
+        if body is not None:
+            body = b''.join(body)
+            caches['runlog'].set(cache_key, (body, gzip.compress(body)))
+
+    def _generate_runlog(self, contest, pics, users, compilers, runs, delta, next_since):
+        """
+        Yields the runlog in chunks. Users and languages are queried beforehand, so that runs can
+        be written as they are read from a server-side cursor, without keeping them in memory.
+        """
+
+        yield (
+            b'<?xml version="1.0" encoding="utf-8"?>'
+            b'<runlog contest_id="%d" duration="%d" fog_time="%d"'
+            b' start_time="%s" stop_time="%s" current_time="%s" delta="%s" next_since="%s">'
+            b'<name>%s</name>'
+            b'<users>' % (
+                contest.id,
+                contest.duration * 60,
+                contest.freezing_time * 60,
+                self._encode_datetime(contest.start_time),
+                self._encode_datetime(contest.finish_time),
+                self._encode_datetime(timezone.now()),
+                b'yes' if delta else b'no',
+                next_since.encode(),
+                saxutils.escape(contest.name).encode(),
+            )
+        )
+        yield b''.join(
+            b'<user id="%d" name=%s/>' % (user_id, saxutils.quoteattr(username).encode())
+            for user_id, username in users
+        )
+        yield b'</users><problems>'
+        yield b''.join(
+            b'<problem id="%d" short_name="%c" long_name=%s/>' % (
+                pic_id, letter.encode(), saxutils.quoteattr(name).encode(),
+            ) for pic_id, letter, name in pics
+        )
+        yield b'</problems><languages>'
+        yield b''.join(
+            b'<language id="%d" short_name=%s long_name=%s/>' % (
+                compiler_id,
+                saxutils.quoteattr(codename).encode(),
+                saxutils.quoteattr(name).encode(),
+            ) for compiler_id, codename, name in compilers
+        )
+        yield b'</languages><runs>'
+
+        chunk = [ ]
+        size = 0
         # We generate XML "by hand" for extra speed.
-        for (attempt_id, submit_time_sec, result, score, time_ns, user_id, username, pic_id,
-            compiler_id, codename, compiler_name) in attempts:
+        for (attempt_id, submit_time_sec, verdict_code, test_number, score, time_ns, user_id,
+            pic_id, compiler_id) in runs.iterator():
 
-            users[user_id] = username
-            compilers[compiler_id] = (codename, compiler_name)
-            status, test = Attempt.encode_ejudge_verdict(result, score)
+            status, test = Attempt.encode_ejudge_verdict(verdict_code, test_number, score)
+            run_uuid = str(uuid.uuid5(self._RUN_NAMESPACE, str(attempt_id))).encode()
             if (contest.is_school):
                 pts = 0
                 if (score is not None):
                     pts = int(score)
-                a.write(
+                run = (
                     b'<run run_id="%d" time="%d"'
                     b' user_id="%d" prob_id="%d" lang_id="%d" status="%s" score="%d" test="%d"'
                     b' nsec="%d" run_uuid="%s" passed_mode="yes"/>' % (
                         attempt_id, submit_time_sec,
                         user_id, pic_id, compiler_id, status, pts, test,
-                        time_ns or 0, str(uuid.uuid4()).encode(),
+                        time_ns or 0, run_uuid,
                     )
                 )
             else:
-                a.write(
+                run = (
                     b'<run run_id="%d" time="%d"'
                     b' user_id="%d" prob_id="%d" lang_id="%d" status="%s" test="%d"'
                     b' nsec="%d" run_uuid="%s" passed_mode="yes"/>' % (
                         attempt_id, submit_time_sec,
                         user_id, pic_id, compiler_id, status, test,
-                        time_ns or 0, str(uuid.uuid4()).encode(),
+                        time_ns or 0, run_uuid,
                     )
                 )
-        r = HttpResponse(content_type='application/xml')
-        r.write(
-            b'<?xml version="1.0" encoding="utf-8"?>'
-            b'<runlog contest_id="%s" duration="%d" fog_time="%d"'
-            b' start_time="%s" stop_time="%s" current_time="%s">'
-            b'<name>%s</name>'
-            b'<users>' % (
-                contest_id.encode(),
-                contest.duration * 60,
-                contest.freezing_time * 60,
-                self._encode_datetime(contest.start_time),
-                self._encode_datetime(contest.finish_time),
-                self._encode_datetime(timezone.now()),
-                saxutils.escape(contest.name).encode(),
-            )
-        )
-        for user_id, username in users.items():
-            r.write(b'<user id="%d" name=%s/>' % (user_id, saxutils.quoteattr(username).encode()))
-        r.write(b'</users><problems>')
-        for pic_id, letter, name in pics:
-            r.write(b'<problem id="%d" short_name="%c" long_name=%s/>' % (
-                pic_id, letter.encode(), saxutils.quoteattr(name).encode(),
-            ))
-        r.write(b'</problems><languages>')
-        for compiler_id, (codename, name) in compilers.items():
-            r.write(
-                b'<language id="%d" short_name=%s long_name=%s/>' % (
-                compiler_id,
-                saxutils.quoteattr(codename).encode(),
-                saxutils.quoteattr(name).encode(),
-            ))
-        r.write(b'</languages><runs>')
-        r.write(a.getvalue())
-        r.write(b'</runs></runlog>')
-        return r
+            chunk.append(run)
+            size += len(run)
+            if size >= self.CHUNK_SIZE:
+                yield b''.join(chunk)
+                chunk.clear()
+                size = 0
+
+        chunk.append(b'</runs></runlog>')
+        yield b''.join(chunk)
 
 
 class XMLStandingsView(StandingsDueTimeMixin, BaseXMLStandingsView):
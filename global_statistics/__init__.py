@@ -0,0 +1 @@
+default_app_config = 'global_statistics.apps.GlobalStatisticsConfig'
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class GlobalStatisticsConfig(AppConfig):
+    name = 'global_statistics'
+
+    def ready(self):
+        from . import signals
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 18:31
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('users', '0002_auto_20171109_2311'),
+        ('core', '0014_attempt_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatedContest',
+            fields=[
+                ('contest', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='core.Contest')),
+            ],
+            options={
+                'db_table': 'rated_contests',
+            },
+        ),
+        migrations.CreateModel(
+            name='RatingWatermark',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('updated_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'rating_watermark',
+            },
+        ),
+        migrations.CreateModel(
+            name='UserRating',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('problems_solved', models.PositiveIntegerField()),
+                ('last_success', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'user_ratings',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='userrating',
+            index=models.Index(fields=['-problems_solved', 'last_success'], name='user_ratings_rank_idx'),
+        ),
+        migrations.RunSQL("""
+            INSERT INTO rating_watermark (updated_at)
+            SELECT COALESCE(MAX(updated_at), now()) FROM attempts;
+
+            INSERT INTO rated_contests (contest_id)
+            SELECT c.id
+            FROM contests c
+            WHERE NOT c.is_admin
+            AND (c.is_training OR (
+                c.is_unfrozen AND
+                now() >= c.start_time + c.duration * interval '1 minute'
+            ));
+
+            INSERT INTO user_ratings (user_id, problems_solved, last_success)
+            SELECT user_id, COUNT(*), MAX(first_success)
+            FROM (
+                SELECT a.user_id, MIN(a.created_at) AS first_success
+                FROM attempts a
+                JOIN problem_in_contests pic ON pic.id = a.problem_in_contest_id
+                JOIN rated_contests rc ON rc.contest_id = pic.contest_id
+                WHERE a.result = 'Accepted' OR (a.result = 'Tested' AND a.score > 99.99)
+                GROUP BY a.user_id, pic.problem_id
+            ) solved
+            GROUP BY user_id;
+        """, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 18:34
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_first_solves'),
+        ('global_statistics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='RatingWatermark',
+        ),
+        migrations.RunSQL("""
+            DELETE FROM user_ratings;
+
+            INSERT INTO user_ratings (user_id, problems_solved, last_success)
+            SELECT user_id, COUNT(*), MAX(first_success)
+            FROM (
+                SELECT fs.user_id, MIN(fs.time) AS first_success
+                FROM first_solves fs
+                JOIN rated_contests rc ON rc.contest_id = fs.contest_id
+                GROUP BY fs.user_id, fs.problem_id
+            ) solved
+            GROUP BY user_id;
+        """, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-18 18:36
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_first_solves'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('global_statistics', '0002_rating_from_first_solves'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BestTime',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('used_time', models.FloatField(blank=True, null=True)),
+                ('used_memory', models.PositiveIntegerField(blank=True, null=True)),
+                ('submitted_at', models.DateTimeField()),
+                ('attempt', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.Attempt')),
+                ('compiler', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.Compiler')),
+                ('problem', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='core.Problem')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'best_times',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='besttime',
+            index=models.Index(fields=['problem', 'used_time', 'used_memory', 'submitted_at'], name='best_times_rank_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='besttime',
+            unique_together=set([('problem', 'user')]),
+        ),
+        migrations.RunSQL("""
+            INSERT INTO best_times (
+                problem_id, user_id, attempt_id, compiler_id, used_time, used_memory, submitted_at
+            )
+            SELECT DISTINCT ON (pic.problem_id, a.user_id)
+                pic.problem_id, a.user_id, a.id, a.compiler_id, a.used_time, a.used_memory,
+                a.created_at
+            FROM attempts a
+            JOIN problem_in_contests pic ON pic.id = a.problem_in_contest_id
+            JOIN rated_contests rc ON rc.contest_id = pic.contest_id
+            WHERE a.result = 'Accepted' OR (a.result = 'Tested' AND a.score > 99.99)
+            ORDER BY pic.problem_id, a.user_id, a.used_time, a.used_memory, a.id;
+        """, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,237 @@
+from django.db import connection, models as md, transaction
+
+from core.models  import (
+    VERDICT_ACCEPTED, VERDICT_TESTED,
+    Attempt, Compiler, Contest, FirstSolve, Problem, ProblemInContest,
+)
+from users.models import User
+
+
+class RatedContest(md.Model):
+    """
+    A contest whose accepted attempts count towards the global rating: either a public
+    training, or a public contest that is over and unfrozen. The latter becomes rated just by
+    the passage of time, so the table is brought up to date lazily, see
+    `UserRatingQuerySet.sync_contests`.
+    """
+
+    contest = md.OneToOneField(Contest, md.CASCADE, primary_key=True)
+
+    class Meta:
+        db_table = 'rated_contests'
+
+    def __str__(self):
+        return str(self.contest)
+
+
+class UserRatingQuerySet(md.QuerySet):
+    def refresh(self, user_ids):
+        """
+        Recalculates the rating of the given users.
+        """
+
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("""
+                DELETE FROM user_ratings WHERE user_id = ANY(%s);
+
+                INSERT INTO user_ratings (user_id, problems_solved, last_success)
+                SELECT user_id, COUNT(*), MAX(first_success)
+                FROM (
+                    SELECT fs.user_id, MIN(fs.time) AS first_success
+                    FROM first_solves fs
+                    JOIN rated_contests rc ON rc.contest_id = fs.contest_id
+                    WHERE fs.user_id = ANY(%s)
+                    GROUP BY fs.user_id, fs.problem_id
+                ) solved
+                GROUP BY user_id
+                ON CONFLICT (user_id) DO UPDATE SET
+                    problems_solved = EXCLUDED.problems_solved,
+                    last_success    = EXCLUDED.last_success;
+            """, [user_ids, user_ids])
+
+    def refresh_solvers(self, contest_ids):
+        """
+        Recalculates the rating of everyone who has solved anything in the given contests.
+        """
+
+        self.refresh(
+            FirstSolve
+            .objects
+            .filter(contest__in=contest_ids)
+            .values_list('user', flat=True)
+            .distinct()
+        )
+
+    def sync_contests(self):
+        """
+        Brings `RatedContest`s up to date, recalculating the rating of those affected.
+        """
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("""
+                WITH expected AS (
+                    SELECT c.id
+                    FROM contests c
+                    WHERE NOT c.is_admin
+                    AND (c.is_training OR (
+                        c.is_unfrozen AND
+                        now() >= c.start_time + c.duration * interval '1 minute'
+                    ))
+                ), added AS (
+                    INSERT INTO rated_contests (contest_id)
+                    SELECT id FROM expected
+                    ON CONFLICT DO NOTHING
+                    RETURNING contest_id
+                ), removed AS (
+                    DELETE FROM rated_contests
+                    WHERE contest_id NOT IN (SELECT id FROM expected)
+                    RETURNING contest_id
+                )
+                SELECT contest_id FROM added
+                UNION ALL
+                SELECT contest_id FROM removed
+            """)
+            contest_ids = [contest_id for contest_id, in cursor]
+            if contest_ids:
+                self.refresh_solvers(contest_ids)
+                BestTime.objects.refresh_problems(
+                    ProblemInContest
+                    .objects
+                    .filter(contest__in=contest_ids)
+                    .values_list('problem', flat=True)
+                    .distinct()
+                )
+
+    def sync(self):
+        """
+        Catches up with everything signals cannot notice. Called periodically by the
+        `syncstatistics` command, so that pages only read.
+        """
+
+        self.sync_contests()
+        FirstSolve.objects.sync()
+
+
+class UserRating(md.Model):
+    """
+    The number of problems a user has solved in rated contests, and when the last of them was
+    first solved. Only users who have solved anything have a rating. Kept up to date by
+    `global_statistics.signals` and `UserRatingQuerySet.sync`.
+    """
+
+    user            = md.OneToOneField(User, md.CASCADE, primary_key=True, related_name='rating')
+    problems_solved = md.PositiveIntegerField()
+    last_success    = md.DateTimeField()
+
+    objects = UserRatingQuerySet.as_manager()
+
+    class Meta:
+        db_table = 'user_ratings'
+        indexes  = [
+            md.Index(fields=['-problems_solved', 'last_success'], name='user_ratings_rank_idx'),
+        ]
+
+    def __str__(self):
+        return '{0.user}: {0.problems_solved}'.format(self)
+
+
+class BestTimeQuerySet(md.QuerySet):
+    SQL = """
+        INSERT INTO best_times (
+            problem_id, user_id, attempt_id, compiler_id, used_time, used_memory, submitted_at
+        )
+        SELECT DISTINCT ON (pic.problem_id, a.user_id)
+            pic.problem_id, a.user_id, a.id, a.compiler_id, a.used_time, a.used_memory,
+            a.created_at
+        FROM attempts a
+        JOIN problem_in_contests pic ON pic.id = a.problem_in_contest_id
+        JOIN rated_contests rc ON rc.contest_id = pic.contest_id
+        WHERE {0}
+        AND (a.verdict_code = {accepted} OR (a.verdict_code = {tested} AND a.score > 99.99))
+        ORDER BY pic.problem_id, a.user_id, a.used_time, a.used_memory, a.id
+        ON CONFLICT (problem_id, user_id) DO UPDATE SET
+            attempt_id   = EXCLUDED.attempt_id,
+            compiler_id  = EXCLUDED.compiler_id,
+            used_time    = EXCLUDED.used_time,
+            used_memory  = EXCLUDED.used_memory,
+            submitted_at = EXCLUDED.submitted_at;
+
+        DELETE FROM best_times b
+        WHERE {1}
+        AND NOT EXISTS (
+            SELECT 1
+            FROM attempts a
+            JOIN problem_in_contests pic ON pic.id = a.problem_in_contest_id
+            JOIN rated_contests rc ON rc.contest_id = pic.contest_id
+            WHERE a.user_id = b.user_id
+            AND pic.problem_id = b.problem_id
+            AND (a.verdict_code = {accepted} OR (a.verdict_code = {tested} AND a.score > 99.99))
+        );
+    """
+
+    def _refresh(self, condition, params):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                self.SQL.format(
+                    condition.format(user='a.user_id', problem='pic.problem_id'),
+                    condition.format(user='b.user_id', problem='b.problem_id'),
+                    accepted=VERDICT_ACCEPTED, tested=VERDICT_TESTED,
+                ),
+                params * 2,
+            )
+
+    def refresh(self, cells):
+        """
+        Recalculates best times of the given (user_id, problem_id) pairs.
+        """
+
+        cells = list(cells)
+        if cells:
+            user_ids, problem_ids = zip(*cells)
+            self._refresh(
+                '({user}, {problem}) IN (SELECT * FROM unnest(%s::int[], %s::int[]))',
+                [list(user_ids), list(problem_ids)],
+            )
+
+    def refresh_problems(self, problem_ids):
+        """
+        Recalculates whole leaderboards of the given problems.
+        """
+
+        problem_ids = list(problem_ids)
+        if problem_ids:
+            self._refresh('{problem} = ANY(%s)', [problem_ids])
+
+
+class BestTime(md.Model):
+    """
+    The fastest (then the least memory consuming) accepted attempt of a user for a problem in
+    rated contests. Kept up to date by `global_statistics.signals` and `UserRatingQuerySet.sync`.
+    """
+
+    problem      = md.ForeignKey(Problem, md.CASCADE, db_index=False)
+    user         = md.ForeignKey(User, md.CASCADE)
+    attempt      = md.ForeignKey(Attempt, md.CASCADE)
+    compiler     = md.ForeignKey(Compiler, md.CASCADE, db_index=False)
+    used_time    = md.FloatField(blank=True, null=True)
+    used_memory  = md.PositiveIntegerField(blank=True, null=True)
+    submitted_at = md.DateTimeField()
+
+    objects = BestTimeQuerySet.as_manager()
+
+    class Meta:
+        db_table        = 'best_times'
+        unique_together = ('problem', 'user')
+        indexes         = [
+            md.Index(
+                fields=['problem', 'used_time', 'used_memory', 'submitted_at'],
+                name='best_times_rank_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return '{0.problem} by {0.user}: {0.used_time}'.format(self)
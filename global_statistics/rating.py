@@ -0,0 +1,154 @@
+"""
+Paginated global rating and best time leaderboards. Ranks are calculated by the database from
+per-group counts, so only the requested page is ever fetched.
+"""
+
+from django.db import connection
+
+from users.models import User
+
+
+class RankedRating:
+    """
+    A lazy sequence of rated users, suitable for Django's `Paginator`. Every user gets `rank`
+    and `problems_solved` attributes.
+    """
+
+    def __init__(self, min_problems_solved):
+        self.min_problems_solved = min_problems_solved
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            with connection.cursor() as cursor:
+                cursor.execute("""
+                    SELECT COUNT(*) FROM user_ratings WHERE problems_solved >= %s
+                """, [self.min_problems_solved])
+                self._count = cursor.fetchone()[0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def locate(self, user_id):
+        """
+        Returns the zero-based position of the user in the rating, or `None`.
+        """
+
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT (
+                    SELECT COUNT(*)
+                    FROM user_ratings r
+                    WHERE r.problems_solved > me.problems_solved
+                    OR (
+                        r.problems_solved = me.problems_solved AND
+                        (r.last_success, r.user_id) < (me.last_success, me.user_id)
+                    )
+                )
+                FROM user_ratings me
+                WHERE me.user_id = %s AND me.problems_solved >= %s
+            """, [user_id, self.min_problems_solved])
+            row = cursor.fetchone()
+        return row[0] if row is not None else None
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+
+        start, stop, step = index.indices(self.count())
+        assert step == 1, 'Stepped slices are not supported'
+        if start >= stop:
+            return [ ]
+
+        users = list(User.objects.raw("""
+            WITH groups AS (
+                SELECT
+                    problems_solved, COUNT(*) AS tied,
+                    (SUM(COUNT(*)) OVER (ORDER BY problems_solved DESC) - COUNT(*) + 1)::int AS first
+                FROM user_ratings
+                WHERE problems_solved >= %s
+                GROUP BY problems_solved
+            ), page AS (
+                SELECT *
+                FROM user_ratings
+                WHERE problems_solved >= %s
+                ORDER BY problems_solved DESC, last_success, user_id
+                LIMIT %s OFFSET %s
+            )
+            SELECT u.id, u.username, p.problems_solved, g.first, g.tied
+            FROM page p
+            JOIN groups g ON g.problems_solved = p.problems_solved
+            JOIN users u ON u.id = p.user_id
+            ORDER BY p.problems_solved DESC, p.last_success, p.user_id
+        """, [self.min_problems_solved, self.min_problems_solved, stop - start, start]))
+        _set_ranks(users)
+        return users
+
+
+class RankedBestTimes:
+    """
+    A lazy sequence of users who have solved the problem, from the fastest solution, suitable
+    for Django's `Paginator`. Every user gets `rank`, `best_time`, `best_memory`, `compiler`
+    and `submitted_at` attributes.
+    """
+
+    def __init__(self, problem_id):
+        self.problem_id = problem_id
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            with connection.cursor() as cursor:
+                cursor.execute("""
+                    SELECT COUNT(*) FROM best_times WHERE problem_id = %s
+                """, [self.problem_id])
+                self._count = cursor.fetchone()[0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+
+        start, stop, step = index.indices(self.count())
+        assert step == 1, 'Stepped slices are not supported'
+        if start >= stop:
+            return [ ]
+
+        users = list(User.objects.raw("""
+            WITH groups AS (
+                SELECT
+                    used_time, COUNT(*) AS tied,
+                    (SUM(COUNT(*)) OVER (ORDER BY used_time) - COUNT(*) + 1)::int AS first
+                FROM best_times
+                WHERE problem_id = %s
+                GROUP BY used_time
+            ), page AS (
+                SELECT *
+                FROM best_times
+                WHERE problem_id = %s
+                ORDER BY used_time, used_memory, submitted_at, user_id
+                LIMIT %s OFFSET %s
+            )
+            SELECT
+                u.id, u.username, p.used_time AS best_time, p.used_memory AS best_memory,
+                c.name AS compiler, p.submitted_at, g.first, g.tied
+            FROM page p
+            JOIN groups g ON g.used_time IS NOT DISTINCT FROM p.used_time
+            JOIN users u ON u.id = p.user_id
+            JOIN compilers c ON c.id = p.compiler_id
+            ORDER BY p.used_time, p.used_memory, p.submitted_at, p.user_id
+        """, [self.problem_id, self.problem_id, stop - start, start]))
+        _set_ranks(users)
+        return users
+
+
+def _set_ranks(users):
+    for user in users:
+        if user.tied == 1:
+            user.rank = str(user.first)
+        else:
+            user.rank = '%d-%d' % (user.first, user.first + user.tied - 1)
@@ -0,0 +1,41 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch          import receiver
+
+from core.models import Contest, ProblemInContest, attempts_changed, first_solves_changed
+from .models     import BestTime, UserRating
+
+
+@receiver(first_solves_changed)
+def update_rating(sender, user_ids, **kwargs):
+    UserRating.objects.refresh(user_ids)
+
+
+@receiver(attempts_changed)
+def update_best_times(sender, cells, **kwargs):
+    problem_ids = dict(
+        ProblemInContest
+        .objects
+        .filter(id__in={pic_id for user_id, pic_id in cells})
+        .values_list('id', 'problem')
+    )
+    BestTime.objects.refresh(
+        {(user_id, problem_ids[pic_id]) for user_id, pic_id in cells if pic_id in problem_ids}
+    )
+
+
+@receiver([post_save, post_delete], sender=ProblemInContest)
+def update_problem_best_times(sender, instance, **kwargs):
+    # The problem may have been replaced, so the leaderboard it was in is refreshed as well.
+    problem_ids = {instance.problem_id}
+    problem_ids.update(
+        BestTime
+        .objects
+        .filter(attempt__problem_in_contest=instance.id)
+        .values_list('problem', flat=True)
+    )
+    BestTime.objects.refresh_problems(problem_ids)
+
+
+@receiver([post_save, post_delete], sender=Contest)
+def update_rated_contests(sender, instance, **kwargs):
+    UserRating.objects.sync_contests()
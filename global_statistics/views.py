@@ -1,18 +1,14 @@
 import collections
 
-from django.contrib.auth.mixins   import LoginRequiredMixin
-from django.db.models             import F, Q, Count
-from django.db.models.expressions import RawSQL
-from django.http                  import Http404
-from django.utils                 import timezone
-from django.views.generic         import ListView
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db.models           import F, Count
+from django.http                import Http404
+from django.views.generic       import ListView
 
-from core.models  import Attempt, Problem, Contest, ProblemInContest
-from users.models import User, rank_users
-
-
-def _to_minutes(expression):
-    return expression * RawSQL("interval '1 minute'", ())
+from core.models     import Attempt, FirstSolve, Problem, Contest, ProblemInContest
+from core.views.util import KeysetPaginationMixin
+from users.models    import User
+from .rating        import RankedBestTimes, RankedRating
 
 
 class RatingIndexView(ListView):
@@ -23,36 +19,18 @@ class RatingIndexView(ListView):
     paginate_orphans = 1
 
     def get_queryset(self):
-        users = list(
-            User
-            .objects
-            .raw("""
-                SELECT u.id, u.username, subq.problems_solved
-                FROM (
-                    SELECT id, COUNT(*) AS problems_solved, MAX(first_success) AS last_success
-                    FROM (
-                        SELECT u.id, MIN(a.created_at) AS first_success
-                        FROM users u
-                        JOIN attempts a ON a.user_id = u.id
-                        JOIN problem_in_contests pic ON pic.id = a.problem_in_contest_id
-                        JOIN contests c ON c.id = pic.contest_id
-                        WHERE NOT c.is_admin
-                        AND (c.is_training OR (
-                            c.is_unfrozen AND
-                            now() >= c.start_time + c.duration * interval '1 minute'
-                        ))
-                        AND (a.result = 'Accepted' OR (a.result = 'Tested' AND a.score > 99.99))
-                        GROUP BY u.id, pic.problem_id
-                    ) subq
-                    GROUP BY id
-                ) subq
-                JOIN users u ON u.id = subq.id
-                WHERE subq.problems_solved >= 10
-                ORDER BY subq.problems_solved DESC, subq.last_success
-            """)
-        )
-        rank_users(users, 'problems_solved')
-        return users
+        return RankedRating(min_problems_solved=10)
+
+    def paginate_queryset(self, queryset, page_size):
+        if self.kwargs.get('page') == 'me':
+            user = self.request.user
+            position = queryset.locate(user.id) if user.is_authenticated else None
+            if position is not None:
+                paginator = self.get_paginator(queryset, page_size, self.paginate_orphans)
+                self.kwargs['page'] = min(position // page_size + 1, paginator.num_pages)
+            else:
+                self.kwargs['page'] = 1
+        return super().paginate_queryset(queryset, page_size)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -67,12 +45,11 @@ class RatingIndexView(ListView):
         return context
 
 
-class AttemptsView(LoginRequiredMixin, ListView):
+class AttemptsView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     template_name = 'global_statistics/attempts.html'
     context_object_name = 'attempts'
     allow_empty = True
     paginate_by = 25
-    paginate_orphans = 1
 
     get_queryset = lambda self: (
         Attempt
@@ -84,7 +61,6 @@ class AttemptsView(LoginRequiredMixin, ListView):
             'problem_in_contest__number',
             'problem_in_contest__problem__name', 'problem_in_contest__contest__name',
         )
-        .order_by('-created_at')
     )
 
 
@@ -96,38 +72,7 @@ class BestTimeView(ListView):
     paginate_orphans = 1
 
     def get_queryset(self):
-        now = timezone.now()
-        users = list(
-            User
-            .objects
-            .filter(
-                Q(attempt__problem_in_contest__contest__is_training=True) | Q(
-                    attempt__problem_in_contest__contest__is_unfrozen=True,
-                    # start_time <= now() - duration * interval '1 minute'
-                    attempt__problem_in_contest__contest__start_time__lte=(
-                        now - _to_minutes(F('attempt__problem_in_contest__contest__duration'))
-                    ),
-                ),
-                Q(attempt__result='Accepted') | Q(
-                    attempt__result='Tested',
-                    attempt__score__gt=99.99,
-                ),
-                attempt__problem_in_contest__contest__is_admin=False,
-                attempt__problem_in_contest__problem=self.kwargs['problem_id'],
-            )
-            .annotate(
-                best_time=F('attempt__used_time'),
-                best_memory=F('attempt__used_memory'),
-                compiler=F('attempt__compiler__name'),
-                submitted_at=F('attempt__created_at'),
-            )
-            .only('username')
-            .order_by('id', 'attempt__used_time', 'attempt__used_memory', 'attempt')
-            .distinct('id')
-        )
-        users.sort(key=lambda u: (u.best_time, u.best_memory, u.submitted_at))
-        rank_users(users, 'best_time')
-        return users
+        return RankedBestTimes(self.kwargs['problem_id'])
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -189,17 +134,17 @@ class UserProblemsView(ListView):
         except User.DoesNotExist:
             raise Http404('Не существует пользователя с запрошенным id.')
 
-        query = Q(user=viewed_user) & Q(problem_in_contest__contest__is_admin=False) & (
-            Q(result='Accepted') | (Q(result='Tested') & Q(score__gt=99.99)))
-        attempts = Attempt.objects.filter(query).order_by('problem_in_contest__problem', 'time').distinct(
-            'problem_in_contest__problem')
-
-        problem_statuses = []
-        for attempt in attempts:
-            problem_statuses.append(
-                ProblemStatus(attempt.problem.id, attempt.problem.name,
-                              attempt.time)
+        problem_statuses = [
+            ProblemStatus(*first_solve)
+            for first_solve in (
+                FirstSolve
+                .objects
+                .filter(user=viewed_user, contest__is_admin=False)
+                .order_by('problem', 'time')
+                .distinct('problem')
+                .values_list('problem', 'problem__name', 'time')
             )
+        ]
 
         if self.sort_by_time:
             problem_statuses = sorted(problem_statuses, key=lambda x: x.solved_at, reverse=True)
@@ -0,0 +1,217 @@
+import collections
+import json
+import re
+
+from django.contrib.auth.models import AnonymousUser
+from django.core                import management
+from django.core.cache          import caches
+from django.db                  import connection, reset_queries, transaction
+from django.test                import RequestFactory
+from django.test.utils          import CaptureQueriesContext
+
+from core.models             import Contest, FirstSolve, ProblemInContest
+from core.views.xml_standings import XMLStandingsView
+from global_statistics.models import UserRating
+from global_statistics.views  import BestTimeView, RatingIndexView
+from users.models             import User
+from .benchstandings          import generate_contest, get_builder_factories
+
+
+# Reverts the indexes of `attempts` to what they were before migration `core.0022`.
+BEFORE_SQL = """
+    SET CONSTRAINTS ALL IMMEDIATE;  -- Indexes cannot be changed with deferred checks pending.
+    DROP INDEX attempts_pic_time_idx;
+    DROP INDEX attempts_pic_updated_at_idx;
+    DROP INDEX attempts_counted_idx;
+    CREATE INDEX attempts_before_pic_idx ON attempts (problem_in_contest_id);
+    CREATE INDEX attempts_before_user_idx ON attempts (user_id);
+    CREATE INDEX attempts_before_result_idx ON attempts (result);
+    ANALYZE attempts;
+"""
+
+EXECUTION_TIME = re.compile(r'(?:Execution Time|Total runtime): ([\d.]+) ms')
+# Queries read through server-side cursors (`QuerySet.iterator`) are captured as declarations.
+CURSOR = re.compile(r'\A\s*DECLARE\s.*?\sCURSOR\s.*?\bFOR\s', re.IGNORECASE | re.DOTALL)
+READ = re.compile(r'\s*(SELECT|WITH)\b', re.IGNORECASE)
+# Conservative: also matches `SELECT ... FOR UPDATE` and such words in literals.
+WRITE = re.compile(r'\b(INSERT|UPDATE|DELETE)\b', re.IGNORECASE)
+
+
+def get_targets(contest, frozen):
+    """
+    Returns (name, function) pairs, each function doing what a page or a builder does.
+    """
+
+    factory = RequestFactory()
+    staff = User(username='Benchmark', rights=0x4)
+
+    def request(path, user):
+        request = factory.get(path)
+        request.user = user
+        request.get_host = lambda: 'localhost'  # Not to depend on `ALLOWED_HOSTS`.
+        return request
+
+    def build(builder_factory):
+        name = builder_factory.func.__name__
+        if len(builder_factory.args) > 1:
+            name += '(unfrozen=%s)' % builder_factory.args[1]
+        return name, lambda: builder_factory().build()
+
+    def render(view, path, user=AnonymousUser(), **kwargs):
+        def run():
+            response = view.as_view()(request(path, user), **kwargs)
+            if response.streaming:
+                return b''.join(response.streaming_content)
+            return response.render().content
+        return run
+
+    targets = [build(builder_factory) for builder_factory in get_builder_factories(contest, frozen)]
+    problem_id = (
+        ProblemInContest
+        .objects
+        .filter(contest=contest)
+        .values_list('problem', flat=True)
+        .first()
+    )
+    targets += [
+        ('RatingIndexView', render(RatingIndexView, '/rating/')),
+        ('BestTimeView', render(BestTimeView, '/best_time/', problem_id=str(problem_id))),
+    ]
+    if not contest.is_training:
+        runlog = render(XMLStandingsView, '/standings.xml', staff, contest_id=str(contest.id))
+        targets.append(('BaseXMLStandingsView', runlog))
+
+        def delta_runlog():
+            since = re.search(rb'next_since="([^"]*)"', runlog()).group(1).decode()
+            return render(
+                XMLStandingsView, '/standings.xml?since=' + since, staff,
+                contest_id=str(contest.id),
+            )()
+        targets.append(('BaseXMLStandingsView(since)', delta_runlog))
+    return targets
+
+
+def explain(run):
+    """
+    Runs the function and returns the plans of the read queries it has made, deduplicated.
+    Statements that write, even if only in a CTE, are not explained: that would repeat them.
+    """
+
+    caches['runlog'].clear()
+    # Once the query log is full, `CaptureQueriesContext` would capture nothing.
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries:
+        run()
+    plans = collections.OrderedDict()
+    with connection.cursor() as cursor:
+        for query in queries.captured_queries:
+            sql = CURSOR.sub('', query['sql'], count=1)
+            if sql in plans or not READ.match(sql) or WRITE.search(sql):
+                continue
+            # Parameters have been substituted already.
+            cursor.execute('EXPLAIN (ANALYZE, BUFFERS) ' + sql)
+            plans[sql] = '\n'.join(line for line, in cursor)
+    return plans
+
+
+def get_total_time(plans):
+    return sum(float(EXECUTION_TIME.search(plan).group(1)) for plan in plans.values())
+
+
+class Command(management.base.BaseCommand):
+    help = (
+        'Generate a synthetic contest and print, as JSON, the plans of the queries made by '
+        'standings builders, the rating, best times and the runlog, with the current indexes of '
+        'attempts and with those before they were tuned. Nothing is left in the database'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('-p', '--participants', type=int, default=1000, help="""
+            Number of participants (default: %(default)s).
+        """)
+        parser.add_argument('-n', '--problems', type=int, default=10, help="""
+            Number of problems (default: %(default)s).
+        """)
+        parser.add_argument('-a', '--attempts', type=int, default=3, help="""
+            Maximum number of attempts per participant per problem (default: %(default)s).
+        """)
+        parser.add_argument('-d', '--density', type=float, default=.5, help="""
+            Probability of each of these attempts to be actually sent (default: %(default)s).
+        """)
+        parser.add_argument('--kirov', action='store_true', help="""
+            Generate a Kirov (school) contest instead of an ACM one.
+        """)
+        parser.add_argument('--training', action='store_true', help="""
+            Generate a training instead of a timed contest. Timed contests are always frozen:
+            runlogs need freezing time.
+        """)
+        parser.add_argument('--other-contests', type=int, default=9, help="""
+            Number of contests of the same kind generated before the measured one, so that the
+            latter is only a part of `attempts`, as it is in production (default: %(default)s).
+        """)
+        parser.add_argument('--seed', type=int, default=0, help="""
+            Random seed (default: %(default)s).
+        """)
+        parser.add_argument('-o', '--output', help="""
+            File to write the results to (default: standard output).
+        """)
+
+    def handle(self, *, participants, problems, attempts, density, kirov, training, other_contests,
+               seed, output, **options):
+        config = collections.OrderedDict([
+            ('participants', participants),
+            ('problems', problems),
+            ('attempts', attempts),
+            ('density', density),
+            ('kirov', kirov),
+            ('training', training),
+            ('other_contests', other_contests),
+            ('seed', seed),
+        ])
+        frozen = not training
+        with transaction.atomic():
+            for i in range(other_contests + 1):
+                contest = generate_contest(
+                    participants=participants, problems=problems, attempts=attempts,
+                    density=density, school=kirov, training=training, frozen=frozen,
+                    seed=seed + i,
+                )
+            # Make the contest rated, so that the rating and best times have something to show.
+            Contest.objects.filter(id=contest.id).update(is_admin=False, is_unfrozen=True)
+            contest.refresh_from_db()
+            FirstSolve.objects.rebuild(contest.id)
+            UserRating.objects.sync_contests()
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+            targets = get_targets(contest, frozen)
+            after = [explain(run) for name, run in targets]
+            with connection.cursor() as cursor:
+                cursor.execute(BEFORE_SQL)
+            before = [explain(run) for name, run in targets]
+
+            transaction.set_rollback(True)
+
+        results = [
+            collections.OrderedDict([
+                ('target', name),
+                ('before_ms', get_total_time(plans_before)),
+                ('after_ms', get_total_time(plans_after)),
+                ('queries', [
+                    collections.OrderedDict([
+                        ('sql', sql),
+                        ('before', plans_before.get(sql)),
+                        ('after', plan),
+                    ]) for sql, plan in plans_after.items()
+                ]),
+            ])
+            for (name, run), plans_before, plans_after in zip(targets, before, after)
+        ]
+        report = json.dumps(collections.OrderedDict([
+            ('config', config), ('results', results),
+        ]), indent=2)
+        if output is None:
+            self.stdout.write(report)
+        else:
+            with open(output, 'w', encoding='utf-8') as f:
+                f.write(report + '\n')
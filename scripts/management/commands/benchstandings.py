@@ -0,0 +1,275 @@
+import collections
+import functools
+import json
+import random
+import statistics
+import time
+
+from django.conf                import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core                import management
+from django.db                  import connection, transaction
+from django.template.loader     import render_to_string
+from django.test                import RequestFactory
+from django.utils               import timezone
+
+from core.models             import (
+    Attempt, Compiler, Contest, Problem, ProblemInContest,
+)
+from core.standings.builders import (
+    AcmStandingsBuilder, AcmTrainingStandingsBuilder,
+    KirovStandingsBuilder, KirovTrainingStandingsBuilder,
+)
+from core.views.util         import get_relative_time_info
+from users.models            import User
+
+
+PHASES = ('pics', 'sql', 'aggregation', 'usernames', 'rank', 'postprocess', 'build', 'render')
+
+
+def generate_contest(*, participants, problems, attempts, density, school, training, frozen, seed):
+    """
+    Creates a contest with synthetic participants, problems and attempts. Attempts are
+    generated by the database itself, so that large contests are set up quickly.
+    """
+
+    random.seed(seed)
+    now = timezone.now()
+    duration = 300
+    if training:
+        start_time = now - timezone.timedelta(days=365)
+    else:
+        start_time = now - timezone.timedelta(minutes=duration + 60)
+    contest = Contest.objects.create(
+        name='Benchmark',
+        start_time=start_time,
+        duration=duration,
+        freezing_time=duration - 60 if frozen and not training else None,
+        is_school=school,
+        is_admin=True,
+        is_training=training,
+    )
+    compiler = Compiler.objects.create(
+        name='Benchmark', codename='bench', runner_codename='bench', extension='txt',
+        highlighter='text',
+    )
+    problem_objects = Problem.objects.bulk_create([
+        Problem(
+            name='Benchmark %d' % i, path='', description='', time_limit=1000,
+            memory_limit=65536, checker='', mask_in='',
+        ) for i in range(problems)
+    ])
+    ProblemInContest.objects.bulk_create([
+        ProblemInContest(
+            problem=problem, contest=contest, number=i,
+            score=random.randint(1, 10) * 10 if school else None,
+        ) for i, problem in enumerate(problem_objects, 1)
+    ])
+    pic_ids = list(ProblemInContest.objects.filter(contest=contest).values_list('id', flat=True))
+    User.objects.bulk_create([
+        User(login='benchmark-%d-%d' % (contest.id, i), username='Participant %d' % i, rights=0x0)
+        for i in range(participants)
+    ])
+    user_ids = list(
+        User
+        .objects
+        .filter(login__startswith='benchmark-%d-' % contest.id)
+        .values_list('id', flat=True)
+    )
+
+    if school:
+        results = "ARRAY['Tested', 'Tested', 'Tested', 'Tested', 'Tested', 'Compilation error']"
+    else:
+        results = """ARRAY[
+            'Accepted', 'Accepted', 'Accepted', 'Wrong answer on test 2', 'Wrong answer on test 7',
+            'Time limit exceeded on test 5', 'Runtime error on test 3', 'Compilation error'
+        ]"""
+    span = (now - start_time if training else timezone.timedelta(minutes=duration)).total_seconds()
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT setseed(%s)', [random.random()])
+        cursor.execute("""
+            WITH generated AS (
+                SELECT
+                    pic.id AS pic_id, u.id AS user_id,
+                    %s + random() * %s * interval '1 second' AS time,
+                    ({0})[1 + floor(random() * array_length({0}, 1))::int] AS result,
+                    (ARRAY[0, 25, 50, 75, 100, 100])[1 + floor(random() * 6)::int] AS score
+                FROM unnest(%s::int[]) u(id)
+                CROSS JOIN unnest(%s::int[]) pic(id)
+                CROSS JOIN generate_series(1, %s) k
+                WHERE random() < %s
+            )
+            INSERT INTO attempts (
+                problem_in_contest_id, user_id, source, compiler_id, time, tester_name, result,
+                used_time, used_memory, score, created_at, updated_at
+            )
+            SELECT
+                pic_id, user_id, '', %s, time, '', result,
+                random(), (random() * 65536)::int,
+                CASE WHEN result = 'Tested' THEN score END, time, now()
+            FROM generated
+        """.format(results), [
+            start_time, span, user_ids, pic_ids, attempts, density, compiler.id,
+        ])
+    return contest
+
+
+def get_builder_factories(contest, frozen):
+    if contest.is_training:
+        if contest.is_school:
+            return [functools.partial(KirovTrainingStandingsBuilder, contest)]
+        return [functools.partial(AcmTrainingStandingsBuilder, contest)]
+
+    cls = KirovStandingsBuilder if contest.is_school else AcmStandingsBuilder
+    unfrozen = [False, True] if frozen else [True]
+    return [functools.partial(cls, contest, u) for u in unfrozen]
+
+
+def instrument(builder, timings):
+    """
+    Wraps the builder's steps so that the time spent in each of them is added to `timings`.
+    """
+
+    def timed(phase, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timings[phase] += time.perf_counter() - start
+        return wrapper
+
+    generate_attempts = builder.generate_attempts
+    builder.generate_attempts = timed('sql', lambda *args: iter(list(generate_attempts(*args))))
+    builder.build_table = timed('aggregation', builder.build_table)
+    for phase, name in [
+        ('pics', 'fetch_pics'),
+        ('usernames', 'fetch_usernames'),
+        ('rank', 'rank'),
+        ('postprocess', 'postprocess'),
+        ('build', 'build'),
+    ]:
+        setattr(builder, name, timed(phase, getattr(builder, name)))
+
+
+def measure(builder, request):
+    timings = collections.Counter()
+    instrument(builder, timings)
+    pics, table, extras, column_aggregations, other_aggregations = builder.build()
+    timings['aggregation'] -= timings['sql']
+
+    start = time.perf_counter()
+    render_to_string('contests/rating.html', {
+        'contest': builder.contest,
+        'time_info': get_relative_time_info(builder.contest),
+        'available': True,
+        'notifications': [ ],
+        'problems': pics,
+        'extras': extras,
+        'summary': other_aggregations,
+        'standings': table,
+        'statistics': column_aggregations,
+    }, request)
+    timings['render'] = time.perf_counter() - start
+    return timings, len(table)
+
+
+class Command(management.base.BaseCommand):
+    help = (
+        'Generate a synthetic contest, time every phase of building its standings and print '
+        'the results as JSON. Nothing is left in the database'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('-p', '--participants', type=int, default=1000, help="""
+            Number of participants (default: %(default)s).
+        """)
+        parser.add_argument('-n', '--problems', type=int, default=10, help="""
+            Number of problems (default: %(default)s).
+        """)
+        parser.add_argument('-a', '--attempts', type=int, default=3, help="""
+            Maximum number of attempts per participant per problem (default: %(default)s).
+        """)
+        parser.add_argument('-d', '--density', type=float, default=.5, help="""
+            Probability of each of these attempts to be actually sent (default: %(default)s).
+        """)
+        parser.add_argument('--kirov', action='store_true', help="""
+            Generate a Kirov (school) contest instead of an ACM one.
+        """)
+        parser.add_argument('--training', action='store_true', help="""
+            Generate a training instead of a timed contest.
+        """)
+        parser.add_argument('--frozen', action='store_true', help="""
+            Freeze the standings of a timed contest (both tables are measured then).
+        """)
+        parser.add_argument('-r', '--repeat', type=int, default=5, help="""
+            How many times to build each table (default: %(default)s).
+        """)
+        parser.add_argument('--seed', type=int, default=0, help="""
+            Random seed (default: %(default)s).
+        """)
+        parser.add_argument('-o', '--output', help="""
+            File to write the results to (default: standard output).
+        """)
+
+    def handle(self, *, participants, problems, attempts, density, kirov, training, frozen,
+               repeat, seed, output, **options):
+        config = collections.OrderedDict([
+            ('participants', participants),
+            ('problems', problems),
+            ('attempts', attempts),
+            ('density', density),
+            ('kirov', kirov),
+            ('training', training),
+            ('frozen', frozen),
+            ('repeat', repeat),
+            ('seed', seed),
+            ('standings_settings', settings.STANDINGS),
+        ])
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        request.get_host = lambda: 'localhost'  # Not to depend on `ALLOWED_HOSTS`.
+        results = [ ]
+        with transaction.atomic():
+            start = time.perf_counter()
+            contest = generate_contest(
+                participants=participants, problems=problems, attempts=attempts,
+                density=density, school=kirov, training=training, frozen=frozen, seed=seed,
+            )
+            config['setup'] = time.perf_counter() - start
+            config['attempt_count'] = (
+                Attempt
+                .objects
+                .filter(problem_in_contest__contest=contest)
+                .count()
+            )
+
+            for factory in get_builder_factories(contest, frozen):
+                runs = [ ]
+                for i in range(repeat):
+                    builder = factory()
+                    timings, row_count = measure(builder, request)
+                    runs.append(timings)
+                results.append(collections.OrderedDict([
+                    ('builder', type(builder).__name__),
+                    ('unfrozen', getattr(builder, 'unfrozen', None)),
+                    ('rows', row_count),
+                    ('median', collections.OrderedDict(
+                        [(phase, statistics.median(t[phase] for t in runs)) for phase in PHASES]
+                    )),
+                    ('min', collections.OrderedDict(
+                        [(phase, min(t[phase] for t in runs)) for phase in PHASES]
+                    )),
+                ]))
+
+            transaction.set_rollback(True)
+
+        report = json.dumps(collections.OrderedDict([
+            ('config', config), ('results', results),
+        ]), indent=2)
+        if output is None:
+            self.stdout.write(report)
+        else:
+            with open(output, 'w', encoding='utf-8') as f:
+                f.write(report + '\n')
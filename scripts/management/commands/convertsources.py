@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core import management
+from django.db   import connection, transaction
+
+from core.models import Attempt, SourceBlob
+
+
+class Command(management.base.BaseCommand):
+    help = (
+        'Move sources of old attempts to the deduplicated source storage. While '
+        "TESTING['LEGACY_SOURCES'] is on, they are copied and kept in attempts as well"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="""
+            Number of attempts converted in a single transaction (default: %(default)s).
+        """)
+
+    def convert_batch(self, batch_size, keep):
+        with transaction.atomic():
+            attempts = Attempt.objects.filter(legacy_source__isnull=False)
+            if keep:
+                attempts = attempts.filter(source_blob=None)
+            attempts = list(
+                attempts
+                .order_by('id')
+                .select_for_update(skip_locked=True)
+                .values_list('id', 'legacy_source')[:batch_size]
+            )
+            if not attempts:
+                return 0
+
+            attempt_ids, sources = zip(*attempts)
+            blobs = SourceBlob.objects.store(sources)
+            with connection.cursor() as cursor:
+                # `updated_at` is left alone: nothing visible has changed.
+                cursor.execute("""
+                    UPDATE attempts a
+                    SET source_hash = v.hash, source = CASE WHEN %s THEN source END
+                    FROM unnest(%s::int[], %s::varchar[]) v(id, hash)
+                    WHERE a.id = v.id
+                """, [keep, list(attempt_ids), [blob.hash for blob in blobs]])
+            return len(attempts)
+
+    def handle(self, *, batch_size, **options):
+        keep = settings.TESTING['LEGACY_SOURCES']
+        total = 0
+        while True:
+            converted = self.convert_batch(batch_size, keep)
+            if not converted:
+                break
+            total += converted
+            self.stdout.write('%d attempts converted.' % total)
+        self.stdout.write('%d distinct sources stored.' % SourceBlob.objects.count())
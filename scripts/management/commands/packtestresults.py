@@ -0,0 +1,55 @@
+import itertools
+
+from django.core import management
+from django.db   import transaction
+
+from core.models import LegacyTestInfo, TestInfo, TestResults
+
+
+class Command(management.base.BaseCommand):
+    help = 'Pack test results of old attempts, stored a row per test, into a row per attempt'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="""
+            Number of attempts converted in a single transaction (default: %(default)s).
+        """)
+
+    def convert_batch(self, batch_size):
+        with transaction.atomic():
+            attempt_ids = list(
+                LegacyTestInfo
+                .objects
+                .order_by('attempt')
+                .values_list('attempt', flat=True)
+                .distinct()[:batch_size]
+            )
+            if not attempt_ids:
+                return 0
+
+            tests = (
+                LegacyTestInfo
+                .objects
+                .filter(attempt__in=attempt_ids)
+                .select_for_update()
+                .order_by('attempt', 'test_number', 'id')
+                .values_list(
+                    'attempt', 'test_number', 'result', 'used_time', 'used_memory',
+                    'checker_comment',
+                )
+            )
+            TestResults.objects.bulk_create([
+                # Of duplicate test numbers, the last one wins.
+                TestResults.pack(attempt_id, [TestInfo(*test[1:]) for test in attempt_tests])
+                for attempt_id, attempt_tests in itertools.groupby(tests, lambda test: test[0])
+            ])
+            LegacyTestInfo.objects.filter(attempt__in=attempt_ids).delete()
+            return len(attempt_ids)
+
+    def handle(self, *, batch_size, **options):
+        total = 0
+        while True:
+            converted = self.convert_batch(batch_size)
+            if not converted:
+                break
+            total += converted
+            self.stdout.write('%d attempts converted.' % total)
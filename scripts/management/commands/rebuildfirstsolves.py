@@ -0,0 +1,20 @@
+from django.core import management
+from django.db   import transaction
+
+from core.models import Contest, FirstSolve
+
+
+class Command(management.base.BaseCommand):
+    help = 'Recalculate first solves after attempts have been changed bypassing the ORM'
+
+    def add_arguments(self, parser):
+        parser.add_argument('contest', type=int, nargs='*', help="""
+            Contest ID to recalculate first solves for (default: all contests).
+        """)
+
+    def handle(self, *, contest, **options):
+        contest_ids = contest or Contest.objects.values_list('id', flat=True).order_by('id')
+        for contest_id in contest_ids:
+            with transaction.atomic():
+                FirstSolve.objects.rebuild(contest_id)
+            self.stdout.write('Contest %d done.' % contest_id)
@@ -0,0 +1,15 @@
+from django.core import management
+from django.db   import transaction
+
+from global_statistics.models import UserRating
+from users.models             import User
+
+
+class Command(management.base.BaseCommand):
+    help = 'Recalculate the global rating after attempts have been changed bypassing the ORM'
+
+    def handle(self, **options):
+        with transaction.atomic():
+            UserRating.objects.sync_contests()
+            UserRating.objects.refresh(User.objects.values_list('id', flat=True))
+        self.stdout.write('Rating rebuilt.')
@@ -0,0 +1,20 @@
+from django.core import management
+from django.db   import transaction
+
+from core.models import AttemptSummary, Contest
+
+
+class Command(management.base.BaseCommand):
+    help = 'Recalculate attempt summaries, should they have drifted from the attempts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('contest', type=int, nargs='*', help="""
+            Contest ID to recalculate summaries for (default: all contests).
+        """)
+
+    def handle(self, *, contest, **options):
+        contest_ids = contest or Contest.objects.values_list('id', flat=True).order_by('id')
+        for contest_id in contest_ids:
+            with transaction.atomic():
+                AttemptSummary.objects.rebuild(contest_id)
+            self.stdout.write('Contest %d done.' % contest_id)
@@ -0,0 +1,25 @@
+import time
+
+from django.core import management
+
+from global_statistics.models import UserRating
+
+
+class Command(management.base.BaseCommand):
+    help = (
+        'Apply attempts changed bypassing the ORM (e.g., verdicts written by the tester) to first '
+        'solves, ratings, best times and achievements'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('-i', '--interval', type=float, help="""
+            Keep running, syncing every that many seconds (default: sync once and exit).
+        """)
+
+    def handle(self, *, interval, **options):
+        while True:
+            # Also syncs first solves, whose changes unlock achievements.
+            UserRating.objects.sync()
+            if interval is None:
+                break
+            time.sleep(interval)
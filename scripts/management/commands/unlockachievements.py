@@ -0,0 +1,85 @@
+import multiprocessing
+import os
+
+from django.core      import management
+from django.db        import connections
+from django.db.models import Max, Min
+
+from achievements.models import Achievement, UserAchievement, get_solved_problems_by_user
+from users.models        import User
+
+
+def unlock_range(task):
+    """
+    Grants achievements to users of an ID range. Returns the number of those granted.
+    """
+
+    achievement_ids, first_user_id, last_user_id = task
+    achievements = Achievement.objects.all()
+    if achievement_ids:
+        achievements = achievements.filter(id__in=achievement_ids)
+    achievements = list(achievements)
+    earned = set(
+        UserAchievement
+        .objects
+        .filter(user__id__range=(first_user_id, last_user_id), achievement__in=achievements)
+        .values_list('user', 'achievement')
+    )
+
+    unlocked = [ ]
+    for user_id, solved_problems in get_solved_problems_by_user(first_user_id, last_user_id).items():
+        for achievement in achievements:
+            if (user_id, achievement.id) not in earned:
+                status = achievement.evaluate(solved_problems)
+                if status.unlocked:
+                    unlocked.append((user_id, achievement.id, status.earned_at))
+    return UserAchievement.objects.grant(unlocked)
+
+
+def close_connections():
+    # Connections must not be shared between processes.
+    connections.close_all()
+
+
+class Command(management.base.BaseCommand):
+    help = 'Grant achievements to every user who has earned them but not been granted yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('achievement', type=int, nargs='*', help="""
+            Achievement ID to evaluate (default: all achievements).
+        """)
+        parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help="""
+            Number of worker processes (default: %(default)s).
+        """)
+        parser.add_argument('--chunk-size', type=int, default=1000, help="""
+            Number of user IDs a worker processes at once (default: %(default)s).
+        """)
+
+    def handle(self, *, achievement, jobs, chunk_size, **options):
+        bounds = User.objects.aggregate(first=Min('id'), last=Max('id'))
+        if bounds['first'] is None:
+            return
+
+        tasks = [
+            (achievement, first_user_id, first_user_id + chunk_size - 1)
+            for first_user_id in range(bounds['first'], bounds['last'] + 1, chunk_size)
+        ]
+        if jobs > 1:
+            close_connections()
+            pool = multiprocessing.Pool(jobs, initializer=close_connections)
+            results = pool.imap_unordered(unlock_range, tasks)
+        else:
+            pool = None
+            results = map(unlock_range, tasks)
+
+        granted = 0
+        try:
+            for done, count in enumerate(results, 1):
+                granted += count
+                self.stdout.write('%d/%d chunks done, %d achievements granted.' % (
+                    done, len(tasks), granted,
+                ))
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
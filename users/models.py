@@ -1,10 +1,6 @@
-import operator
-
 from django.contrib import auth
 from django.db      import models as md
 
-from misc.itertools import indexed_groupby
-
 
 class UserManager(auth.models.BaseUserManager):
     def create_user(self, login, username, password=None, email=None, rights=0x1):
@@ -69,13 +65,3 @@ class User(auth.models.AbstractBaseUser):
 
     def __str__(self):
         return '{0.username} ({0.login})'.format(self)
-
-
-def rank_users(users, field_name, start=1):
-    for i, j, k, g in indexed_groupby(users, operator.attrgetter(field_name), start=start):
-        if i + 1 == j:
-            g[0].rank = str(i)
-        else:
-            rank = '%d-%d' % (i, j - 1)
-            for user in g:
-                user.rank = rank
\ No newline at end of file